@@ -1,27 +1,51 @@
 import numpy as np
 from scipy.ndimage import label
 from sklearn.neighbors import kneighbors_graph
-from path_finding import astar
+from hierarchical_path_finding import HierarchicalPathFinder
+from path_cache import PathCache
+from parallel_routing import route_in_parallel, route_tasks
+from path_finding import movement_cost_grid
+from region_index import RegionIndex
+
+ROUTINGS = ("astar", "dijkstra", "hierarchical")
 
 
 class CityConnector:
-    def __init__(self, city_water_distance: int = 3):
+    def __init__(
+        self,
+        city_water_distance: int = 3,
+        routing: str = "astar",
+        workers: int = 1,
+        path_cache: PathCache | None = None,
+    ):
         self._next_region_id = 1
         self.city_water_distance = city_water_distance
+        # "astar" searches every edge separately, "dijkstra" runs one search
+        # per source city and reads all of its edges from a single parent array,
+        # "hierarchical" answers every edge from one HPA* abstraction of the map
+        if routing not in ROUTINGS:
+            raise ValueError(
+                f"Unknown routing {routing!r}, expected one of {', '.join(ROUTINGS)}"
+            )
+        self.routing = routing
+        # With more than one worker edges are routed on a process pool, the
+        # hierarchical abstraction is built once and only used in process
+        if routing == "hierarchical" and workers > 1:
+            raise ValueError("Hierarchical routing doesn't support workers")
+        self.workers = workers
+        self.path_cache = path_cache
 
     def detect_terrain_regions(
         self,
         terrain_type_map: np.ndarray,
         terrain_types: list[int],
-    ) -> dict[int, np.ndarray]:
+    ) -> RegionIndex:
         binary_mask = np.isin(terrain_type_map, terrain_types)
         connectivity = np.ones((3, 3), dtype=int)
         labeled_array, num_features = label(binary_mask, structure=connectivity)
 
-        regions: dict[int, np.ndarray] = {}
-        for local_region_id in range(1, num_features + 1):
-            regions[self._next_region_id] = labeled_array == local_region_id
-            self._next_region_id += 1
+        regions = RegionIndex(labeled_array, num_features, self._next_region_id)
+        self._next_region_id += num_features
 
         return regions
 
@@ -30,6 +54,146 @@ class CityConnector:
         city_positions: np.ndarray,
         region_to_cities: dict[int, list[int]],
         terrain_movement_time: np.ndarray,
+    ) -> np.ndarray:
+        return self.create_paths_for_networks(
+            city_positions, [(region_to_cities, terrain_movement_time)]
+        )[0]
+
+    def create_paths_for_networks(
+        self,
+        city_positions: np.ndarray,
+        networks: list[tuple[dict[int, list[int]], np.ndarray]],
+    ) -> list[np.ndarray]:
+        routed_networks = []
+        for region_to_cities, terrain_movement_time in networks:
+            edges = self.get_city_edges(city_positions, region_to_cities)
+            positions = city_positions.astype(np.int64)
+            city_indices = (
+                positions[:, 0] * terrain_movement_time.shape[1] + positions[:, 1]
+            )
+            print(f"Drawing {len(edges)} connections on the map...")
+            routed_networks.append(
+                (terrain_movement_time, self._get_routing_tasks(edges, city_indices))
+            )
+
+        # Paths found in the cache are not searched again
+        cache_mode = f"{self.routing}_speed_based"
+        pending_networks = []
+        for terrain_movement_time, tasks in routed_networks:
+            fingerprint = (
+                PathCache.fingerprint(terrain_movement_time)
+                if self.path_cache is not None
+                else None
+            )
+            network_found_paths = {}
+            pending_tasks = []
+            for start_index, target_indices in tasks:
+                missing_targets = []
+                for target_index in target_indices:
+                    path = (
+                        self.path_cache.get(
+                            fingerprint, start_index, target_index, cache_mode
+                        )
+                        if self.path_cache is not None
+                        else None
+                    )
+                    if path is None:
+                        missing_targets.append(target_index)
+                    else:
+                        network_found_paths[(start_index, target_index)] = path
+                if missing_targets:
+                    pending_tasks.append((start_index, missing_targets))
+            pending_networks.append(
+                (
+                    terrain_movement_time,
+                    tasks,
+                    pending_tasks,
+                    network_found_paths,
+                    fingerprint,
+                )
+            )
+
+        network_paths = self._route_networks(
+            [
+                (terrain_movement_time, pending_tasks)
+                for terrain_movement_time, _, pending_tasks, _, _ in pending_networks
+            ]
+        )
+
+        connections_maps = []
+        for (
+            terrain_movement_time,
+            tasks,
+            pending_tasks,
+            network_found_paths,
+            fingerprint,
+        ), connection_paths in zip(pending_networks, network_paths):
+            pending_pairs = [
+                (start_index, target_index)
+                for start_index, target_indices in pending_tasks
+                for target_index in target_indices
+            ]
+            for (start_index, target_index), path in zip(
+                pending_pairs, connection_paths
+            ):
+                network_found_paths[(start_index, target_index)] = path
+                if self.path_cache is not None:
+                    self.path_cache.put(
+                        fingerprint, start_index, target_index, cache_mode, path
+                    )
+
+            connections_map = np.zeros_like(terrain_movement_time)
+            for start_index, target_indices in tasks:
+                for target_index in target_indices:
+                    connections_map[
+                        np.unravel_index(
+                            network_found_paths[(start_index, target_index)],
+                            terrain_movement_time.shape,
+                        )
+                    ] = 8
+            connections_maps.append(connections_map.astype(np.int8))
+        return connections_maps
+
+    def _route_networks(
+        self, networks: list[tuple[np.ndarray, list[tuple[int, list[int]]]]]
+    ) -> list[list[list[int]]]:
+        if self.routing == "hierarchical":
+            network_paths = []
+            for terrain_movement_time, tasks in networks:
+                if not tasks:
+                    network_paths.append([])
+                    continue
+                path_finder = HierarchicalPathFinder(
+                    terrain_movement_time, speed_based=True
+                )
+                network_paths.append(
+                    [
+                        path_finder.find_flat_path(start_index, target_index)
+                        for start_index, target_indices in tasks
+                        for target_index in target_indices
+                    ]
+                )
+            return network_paths
+
+        routing_networks = [
+            (
+                movement_cost_grid(terrain_movement_time, speed_based=True),
+                terrain_movement_time.shape,
+                tasks,
+            )
+            for terrain_movement_time, tasks in networks
+        ]
+        if self.workers > 1:
+            return route_in_parallel(routing_networks, self.routing, self.workers)
+        return [
+            route_tasks(movement_cost, shape, self.routing, tasks)
+            for movement_cost, shape, tasks in routing_networks
+        ]
+
+    def get_city_edges(
+        self,
+        city_positions: np.ndarray,
+        region_to_cities: dict[int, list[int]],
     ) -> np.ndarray:
         all_edges: list[np.ndarray] = []
 
@@ -65,22 +229,57 @@ class CityConnector:
         else:
             edges = np.array([])
 
-        connections_map = np.zeros_like(terrain_movement_time)
+        return edges
+
+    def _get_routing_tasks(
+        self, edges: np.ndarray, city_indices: np.ndarray
+    ) -> list[tuple[int, list[int]]]:
+        if self.routing != "dijkstra":
+            return [(int(city_indices[i]), [int(city_indices[j])]) for i, j in edges]
 
-        print(f"Drawing {len(edges)} connections on the map...")
+        # Cities with most edges become sources first, so every search
+        # settles as many targets as possible
+        degree = np.bincount(np.ravel(edges).astype(np.int64))
+        targets_per_source: dict[int, list[int]] = {}
         for i, j in edges:
-            start_position = city_positions[i]
-            end_position = city_positions[j]
-            connection_path = astar(
-                terrain_movement_time,
-                tuple(start_position),
-                tuple(end_position),
-                speed_based=True,
+            source, target = (i, j) if degree[i] >= degree[j] else (j, i)
+            if target in targets_per_source and source not in targets_per_source:
+                source, target = target, source
+            targets_per_source.setdefault(int(source), []).append(int(target))
+
+        return [
+            (
+                int(city_indices[source]),
+                [int(city_indices[target]) for target in targets],
             )
+            for source, targets in targets_per_source.items()
+        ]
 
-            connections_map[tuple(np.array(connection_path).T)] = 8
+    def generate_cities_connections(
+        self,
+        city_positions: np.ndarray,
+        terrain_type_map: np.ndarray,
+        land_travel_speed_mapping: np.ndarray,
+        water_travel_speed_mapping: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if len(city_positions) < 2:
+            empty_map = np.zeros_like(terrain_type_map).astype(np.int8)
+            return empty_map, empty_map.copy()
 
-        return connections_map.astype(np.int8)
+        land_region_to_cities = self.get_land_region_to_cities(
+            city_positions, terrain_type_map
+        )
+        water_region_to_cities = self.get_water_region_to_cities(
+            city_positions, terrain_type_map
+        )
+        land_connections_map, water_connections_map = self.create_paths_for_networks(
+            city_positions,
+            [
+                (land_region_to_cities, land_travel_speed_mapping[terrain_type_map]),
+                (water_region_to_cities, water_travel_speed_mapping[terrain_type_map]),
+            ],
+        )
+        return land_connections_map, water_connections_map
 
     def generate_cities_connections_land_regions(
         self,
@@ -92,19 +291,27 @@ class CityConnector:
         if n_cities < 2:
             return np.zeros_like(terrain_movement_time).astype(np.int8)
 
+        region_to_cities = self.get_land_region_to_cities(
+            city_positions, terrain_type_map
+        )
+        land_travel_speed = land_travel_speed_mapping[terrain_type_map]
+        return self.create_path_between_cities(
+            city_positions, region_to_cities, land_travel_speed
+        )
+
+    def get_land_region_to_cities(
+        self,
+        city_positions: np.ndarray,
+        terrain_type_map: np.ndarray,
+    ) -> dict[int, list[int]]:
         land_regions = self.detect_terrain_regions(terrain_type_map, [2, 3, 4, 5, 6, 7])
 
-        city_to_region: dict[int, int] = {}
-        for city_idx in range(n_cities):
-            city_pos = tuple(city_positions[city_idx].astype(int))
-            if (
-                city_pos[0] < terrain_type_map.shape[0]
-                and city_pos[1] < terrain_type_map.shape[1]
-            ):
-                for region_id, region_mask in land_regions.items():
-                    if region_mask[city_pos]:
-                        city_to_region[city_idx] = region_id
-                        break
+        city_regions = land_regions.get_region_ids(city_positions)
+        city_to_region: dict[int, int] = {
+            city_idx: int(region_id)
+            for city_idx, region_id in enumerate(city_regions)
+            if region_id
+        }
 
         region_to_cities = self._asign_region_to_city(city_to_region)
 
@@ -112,12 +319,7 @@ class CityConnector:
         print(
             f"Cities per land region: {[len(cities) for cities in region_to_cities.values()]}"
         )
-        land_travel_speed = land_travel_speed_mapping[terrain_type_map]
-        return self.create_path_between_cities(
-            city_positions,
-            region_to_cities,
-            land_travel_speed
-        )
+        return region_to_cities
 
     def generate_cities_connections_water_regions(
         self,
@@ -129,31 +331,9 @@ class CityConnector:
         if n_cities < 2:
             return np.zeros_like(terrain_type_map).astype(np.int8)
 
-        water_regions = self.detect_terrain_regions(terrain_type_map, [0, 1])
-
-        city_to_region: dict[int, int] = {}
-        cities_near_water = 0
-        for city_idx in range(n_cities):
-            city_pos = tuple(city_positions[city_idx].astype(int))
-            if (
-                city_pos[0] < terrain_type_map.shape[0]
-                and city_pos[1] < terrain_type_map.shape[1]
-            ):
-                for region_id, region_mask in water_regions.items():
-                    if self._city_is_near_water(
-                        region_mask, terrain_type_map, city_pos, max_distance=self.city_water_distance
-                    ):
-                        cities_near_water += 1
-                        city_to_region[city_idx] = region_id
-                        break
-
-        region_to_cities = self._asign_region_to_city(city_to_region)
-
-        print(f"Cities within {self.city_water_distance} tiles of water: {cities_near_water}/{n_cities}")
-        print(
-            f"Cities per water region: {[len(cities) for cities in region_to_cities.values()]}"
+        region_to_cities = self.get_water_region_to_cities(
+            city_positions, terrain_type_map
         )
-
         water_travel_speed = water_travel_speed_mapping[terrain_type_map]
         return self.create_path_between_cities(
             city_positions,
@@ -161,29 +341,33 @@ class CityConnector:
             water_travel_speed,
         )
 
-    @staticmethod
-    def _city_is_near_water(
-        water_region_mask: np.ndarray,
+    def get_water_region_to_cities(
+        self,
+        city_positions: np.ndarray,
         terrain_type_map: np.ndarray,
-        city_pos: tuple[int, int],
-        max_distance: int,
-    ) -> bool:
-        min_row = max(0, city_pos[0] - max_distance)
-        max_row = min(terrain_type_map.shape[0], city_pos[0] + max_distance + 1)
-        min_col = max(0, city_pos[1] - max_distance)
-        max_col = min(terrain_type_map.shape[1], city_pos[1] + max_distance + 1)
-
-        nearby_water = np.argwhere(water_region_mask[min_row:max_row, min_col:max_col])
-        if nearby_water.size == 0:
-            return False
-
-        nearby_water[:, 0] += min_row
-        nearby_water[:, 1] += min_col
-        distances = np.sqrt(
-            (nearby_water[:, 0] - city_pos[0]) ** 2
-            + (nearby_water[:, 1] - city_pos[1]) ** 2
+    ) -> dict[int, list[int]]:
+        n_cities = len(city_positions)
+        water_regions = self.detect_terrain_regions(terrain_type_map, [0, 1])
+
+        city_regions = water_regions.get_region_ids(
+            city_positions, max_distance=self.city_water_distance
         )
-        return bool(np.any(distances <= max_distance))
+        city_to_region: dict[int, int] = {
+            city_idx: int(region_id)
+            for city_idx, region_id in enumerate(city_regions)
+            if region_id
+        }
+        cities_near_water = len(city_to_region)
+
+        region_to_cities = self._asign_region_to_city(city_to_region)
+
+        print(
+            f"Cities within {self.city_water_distance} tiles of water: {cities_near_water}/{n_cities}"
+        )
+        print(
+            f"Cities per water region: {[len(cities) for cities in region_to_cities.values()]}"
+        )
+        return region_to_cities
 
     @staticmethod
     def _asign_region_to_city(city_to_region: dict[int, int]) -> dict[int, list[int]]:
@@ -4,7 +4,7 @@ from city import City
 from global_market import GlobalMarket
 from local_market import LocalMarket
 from production_buildings import Farm, IronMine, ToolsSmithy
-from resources import Resource, ResourceName
+from resources import Resource, resource_registry
 
 
 class CityFactory:
@@ -22,7 +22,7 @@ class CityFactory:
 
         resources = {
             resource_name: Resource(resource_name, resource_amount)
-            for resource_name in ResourceName
+            for resource_name in resource_registry
         }
 
         return City(
@@ -147,9 +147,12 @@ class Display:
                 )
                 pygame.draw.line(self.screen, (0, 0, 255), (x1, y1), (x2, y2), 2)
 
-    def draw(self, global_market, map):
+    def draw(self, global_market, map, snapshot=None):
         self.draw_terrain_map(map)
         self.draw_city_on_terrain_map(map)
+        if snapshot is not None:
+            tick_text = self.font.render(f"Tick {snapshot.tick}", True, (0, 0, 0))
+            self.screen.blit(tick_text, (10, 10))
         print(self.clock.get_fps())
 
     def handle_input(self, map):
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+def get_flow_targets(index_shifts: np.ndarray) -> np.ndarray:
+    # Flat index of the cell every cell drains into, clipped to the map edges
+    height, width = index_shifts.shape[:2]
+    rows, cols = np.indices((height, width))
+    target_rows = np.clip(rows + index_shifts[:, :, 0], 0, height - 1)
+    target_cols = np.clip(cols + index_shifts[:, :, 1], 0, width - 1)
+    return (target_rows * width + target_cols).ravel()
+
+
+def accumulate_rain(
+    flow_targets: np.ndarray,
+    shape: tuple[int, int],
+    iterations: int = 30,
+    last_writer_wins: bool = True,
+) -> np.ndarray:
+    number_of_cells = shape[0] * shape[1]
+    accumulation = np.ones(number_of_cells)
+
+    if last_writer_wins:
+        # Water from the last cell in row-major order overwrites the others,
+        # like the original cell by cell loop did
+        last_source = np.full(number_of_cells, -1, dtype=np.int64)
+        np.maximum.at(last_source, flow_targets, np.arange(number_of_cells))
+        has_source = last_source >= 0
+        sources = last_source[has_source]
+
+    for _ in range(iterations):
+        current_water = accumulation + 1
+        if last_writer_wins:
+            rain_movement = np.zeros(number_of_cells)
+            rain_movement[has_source] = current_water[sources]
+        else:
+            rain_movement = np.bincount(
+                flow_targets, weights=current_water, minlength=number_of_cells
+            )
+        accumulation = rain_movement
+
+    return accumulation.reshape(shape)
+
+
+def accumulate_flow_d8(flow_targets: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    # Every cell gets one unit of rain plus everything draining into it.
+    # Cells are processed in topological order of the D8 receiver graph,
+    # a wave at a time, starting with cells nothing drains into.
+    number_of_cells = shape[0] * shape[1]
+    drains = flow_targets != np.arange(number_of_cells)
+    in_degree = np.bincount(flow_targets[drains], minlength=number_of_cells)
+    accumulation = np.ones(number_of_cells)
+
+    frontier = np.flatnonzero(in_degree == 0)
+    while frontier.size:
+        # Sinks keep their water
+        frontier = frontier[drains[frontier]]
+        receivers = flow_targets[frontier]
+        if frontier.size * 16 > number_of_cells:
+            # Wide waves (the first ones) are cheaper as full size bincounts
+            accumulation += np.bincount(
+                receivers, weights=accumulation[frontier], minlength=number_of_cells
+            )
+            in_degree -= np.bincount(receivers, minlength=number_of_cells)
+            reached = np.zeros(number_of_cells, dtype=bool)
+            reached[receivers] = True
+            frontier = np.flatnonzero(reached & (in_degree == 0))
+        else:
+            np.add.at(accumulation, receivers, accumulation[frontier])
+            np.subtract.at(in_degree, receivers, 1)
+            receivers = np.unique(receivers)
+            frontier = receivers[in_degree[receivers] == 0]
+
+    # Cells on flow cycles never reach zero in-degree and act as sinks
+    return accumulation.reshape(shape)
+
+
+def accumulate_rain_reference(index_shifts: np.ndarray, iterations: int = 30):
+    accumulation = np.ones(index_shifts.shape[:2])
+    for _ in range(iterations):
+        rain = np.ones_like(accumulation)
+        current_water = accumulation + rain
+        rain_movement = np.zeros_like(accumulation)
+        for i in range(rain_movement.shape[0]):
+            for j in range(rain_movement.shape[1]):
+                rain_shift = index_shifts[i, j]
+                next_rain_postion_i = min(
+                    rain_movement.shape[0] - 1, max(0, i + rain_shift[0])
+                )
+                next_rain_postion_j = min(
+                    rain_movement.shape[1] - 1, max(0, j + rain_shift[1])
+                )
+                rain_movement[next_rain_postion_i, next_rain_postion_j] = current_water[
+                    i, j
+                ]
+
+        accumulation = rain_movement
+
+    return accumulation
@@ -1,24 +1,33 @@
-import numpy as np
 from events import EventManager
-from map import GameMap
 from npc import NPC
 from resources import ResourceName, Resource
-from global_market import GlobalMarket
 from display import Display
-from city_factory import CityFactory
-from city_connector import CityConnector
+from path_cache import PathCache
+from scheduler import FixedTimestepScheduler, SimulationThread, SnapshotBuffer
+from simulation import Simulation
+from map_pipeline import MapPipeline
+from world_cache import WorldArtifactCache
 
 
 class Game:
     def __init__(self):
         self.seed = 2137
-        np.random.seed(self.seed)
-        self.npcs = []
-        self.global_market = GlobalMarket({}, self.npcs)
-        self.city_factory = CityFactory(self.global_market)
-        self.city_connector = CityConnector()
-        self.game_map = GameMap(self.city_factory, self.city_connector, self.seed)
-        self.global_market.cities = self.game_map.cities
+        # Rivers and roads for the same terrain are read back from disk
+        self.path_cache = PathCache(cache_dir=".cache/paths")
+        self.map_pipeline = MapPipeline(WorldArtifactCache(cache_dir=".cache/world"))
+        self.simulation = Simulation(self.seed, self.path_cache, self.map_pipeline)
+        self.npcs = self.simulation.npcs
+        self.global_market = self.simulation.global_market
+        self.city_factory = self.simulation.city_factory
+        self.city_connector = self.simulation.city_connector
+        self.game_map = self.simulation.game_map
+        # Simulation ticks per second, independent of the display frame rate
+        self.tick_rate = 60
+        self.max_steps_per_frame = 5
+        # Runs the simulation on a worker thread, the display then only reads
+        # the snapshots it publishes
+        self.threaded_simulation = False
+        self.snapshots = SnapshotBuffer()
         self.display = Display(title="Resource Prices")
         self.event_manager = EventManager()
 
@@ -38,29 +47,37 @@ class Game:
 
     def run(self):
         self.setup()
-        running = True
-        iter = 0
-        while running:
-            self.global_market.update_prices()
-            # Process city resource consumption and production
-            for city_name, city in self.game_map.cities.items():
-                city.consume_resources()
-                city.produce_resources()
+        scheduler = FixedTimestepScheduler(
+            self.simulation.tick, self.tick_rate, self.max_steps_per_frame
+        )
+        self.snapshots.publish(self.simulation.make_snapshot())
+        simulation_thread = None
+        if self.threaded_simulation:
+            simulation_thread = SimulationThread(
+                scheduler, self.simulation.make_snapshot, self.snapshots
+            )
+            simulation_thread.start()
 
-            # # Game loop logic
-            # for npc in self.npcs:
-            #     city = next(iter(self.game_map.cities.values()), None)
-            #     if city:
-            #         npc.trade(city)
+        try:
+            while self.snapshots.read().tick <= 2000:
+                if simulation_thread is None and scheduler.advance():
+                    self.snapshots.publish(self.simulation.make_snapshot())
 
-            if not self.display.handle_input(self.game_map):
-                break
-            self.display.draw(self.global_market, self.game_map)
-            self.display.update()
+                # # Game loop logic
+                # for npc in self.npcs:
+                #     city = next(iter(self.game_map.cities.values()), None)
+                #     if city:
+                #         npc.trade(city)
 
-            if iter > 2000:
-                running = False  # Stop after one loop for this example
-            iter += 1
+                if not self.display.handle_input(self.game_map):
+                    break
+                self.display.draw(
+                    self.global_market, self.game_map, self.snapshots.read()
+                )
+                self.display.update()
+        finally:
+            if simulation_thread is not None:
+                simulation_thread.stop()
 
 
 if __name__ == "__main__":
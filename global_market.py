@@ -1,23 +1,48 @@
+import math
 import random
+from functools import partial
+
+import numpy as np
+from history_store import (
+    DEFAULT_HISTORY_CAPACITY,
+    DEFAULT_HISTORY_TIERS,
+    BoundedHistory,
+)
 from local_market import LocalMarket
+from market_engine import MarketEngine
+from rolling_window import RollingHistory
 from city import City
 from npc import NPC
-from resources import ResourceName
+from resources import ResourceName, ResourceValues, resource_registry
 from collections import defaultdict
 
 
 class GlobalMarket:
 
-    def __init__(self, cities: list[City], npcs: list[NPC]):
+    def __init__(
+        self,
+        cities: list[City],
+        npcs: list[NPC],
+        history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+        history_tiers: tuple[tuple[int, int], ...] = DEFAULT_HISTORY_TIERS,
+    ):
         self.cities = cities
         self.npcs = npcs
+        # Ticks of every history kept as they are and the coarser tiers the
+        # older ones are downsampled into, for local markets too
+        self.history_capacity = history_capacity
+        self.history_tiers = history_tiers
 
         self.price_change_factor = 5
         self.number_of_ticks_for_average = 20
         self.total_gold = 0
         self.base_prices = defaultdict(float)
 
-        self.price_history = {ResourceName.Iron: [self.base_prices[ResourceName.Iron]]}
+        self.price_history = {
+            ResourceName.Iron: self._create_history(
+                float, [self.base_prices[ResourceName.Iron]]
+            )
+        }
 
         # Track total consumption and production
         self.total_consumed = defaultdict(int)
@@ -25,10 +50,10 @@ class GlobalMarket:
         self.total_amount = defaultdict(int)
 
         # Track history of consumption and production
-        self.consumption_history = defaultdict(list)
-        self.production_history = defaultdict(list)
-        self.amount_history = defaultdict(list)
-        self.base_prices_history = defaultdict(list)
+        self.consumption_history = defaultdict(self._create_rolling_history)
+        self.production_history = defaultdict(self._create_rolling_history)
+        self.amount_history = defaultdict(partial(self._create_history, np.int64))
+        self.base_prices_history = defaultdict(partial(self._create_history, float))
 
         # Pre-populate with keys from base_prices
         for resource_name in self.base_prices.keys():
@@ -40,16 +65,34 @@ class GlobalMarket:
         }
 
         self.local_markets: list[LocalMarket] = []
-        self.price_value_modifiers = {
-            ResourceName.Iron: 1.5,
-            ResourceName.Wood: 1,
-            ResourceName.Wheat: 0.5,
-            ResourceName.Stone: 1,
-            ResourceName.Tools: 2,
-        }
+        # Totals come from the running sums local markets update on every
+        # change instead of a scan of all markets, check_totals compares
+        # them with a full scan on every tick
+        self.incremental_totals = True
+        self.check_totals = False
+        # Array storage of all local markets
+        self.market_engine = MarketEngine(
+            history_capacity=history_capacity, history_tiers=history_tiers
+        )
+        self.price_value_modifiers = ResourceValues(
+            {
+                ResourceName.Iron: 1.5,
+                ResourceName.Wood: 1,
+                ResourceName.Wheat: 0.5,
+                ResourceName.Stone: 1,
+                ResourceName.Tools: 2,
+            }
+        )
         self.market_share = defaultdict(float)
+        # Price estimates for one more unit of every resource by resource id,
+        # only valid until the next update_prices or a change of the modifiers
+        self.estimated_base_prices: np.ndarray | None = None
+        self._estimated_resources: np.ndarray | None = None
+        self._estimated_modifiers: tuple[ResourceValues, int] | None = None
 
     def update_prices(self):
+        self.estimated_base_prices = None
+        self._estimated_resources = None
         # Calculate total consumption and production
         self.calculate_total_resource_consumed()
         self.calculate_total_resource_produced()
@@ -74,8 +117,9 @@ class GlobalMarket:
                 self.base_prices[resource_name]
             )
 
-        for local_market in self.local_markets:
-            local_market.update_prices()
+        # Prices and history of every local market at once
+        self.market_engine.update_prices(self.current_price)
+        self.estimate_base_resource_prices()
 
     def get_resource_price(self, resource_name: ResourceName) -> float:
         return self.base_prices[resource_name] * (
@@ -101,61 +145,67 @@ class GlobalMarket:
         """
         Calculate the total consumed resources across all cities.
         """
-        # Reset totals
-        for resource_name in self.total_consumed.keys():
-            self.total_consumed[resource_name] = 0
-
-        # Sum up consumption and production from all cities
-        for local_market in self.local_markets:
-            for resource_name in local_market.consumed_resources:
-                self.total_consumed[resource_name] += local_market.consumed_resources[
-                    resource_name
-                ]
+        self._set_totals(
+            self.total_consumed, self._get_market_totals("consumed", "has_consumed")
+        )
 
     def calculate_total_resource_produced(self):
         """
         Calculate the total produced resources across all cities.
         """
-        # Reset totals
-        for resource_name in self.total_produced.keys():
-            self.total_produced[resource_name] = 0
-
-        # Sum up consumption and production from all cities
-        for local_market in self.local_markets:
-            for resource_name in local_market.produced_resources:
-                self.total_produced[resource_name] += local_market.produced_resources[
-                    resource_name
-                ]
+        self._set_totals(
+            self.total_produced, self._get_market_totals("produced", "has_produced")
+        )
 
     def calculate_total_resource_amount(self):
         """
         Calculate the total amount resources across all cities.
         """
-        # Reset totals
-        for resource_name in self.total_amount.keys():
-            self.total_amount[resource_name] = 0
-
-        # Sum up consumption and production from all cities
-        for local_market in self.local_markets:
-            for resource_name in local_market.resources:
-                self.total_amount[resource_name] += local_market.resources[
-                    resource_name
-                ].amount
+        self._set_totals(
+            self.total_amount, self._get_market_totals("amounts", "has_amount")
+        )
 
     def calculate_total_gold(self):
         """
         Calculate the total gold across all entities
         """
-        self.total_gold = 0
-        # Sum up consumption and production from all cities
-        for local_market in self.local_markets:
-            self.total_gold += local_market.gold
+        if not self.incremental_totals:
+            self.total_gold = self.market_engine.get_total_gold()
+        else:
+            self.total_gold = self.market_engine.total_gold
+            if self.check_totals and not math.isclose(
+                self.total_gold, self.market_engine.get_total_gold()
+            ):
+                raise RuntimeError(
+                    f"Running total gold {self.total_gold} differs from "
+                    f"{self.market_engine.get_total_gold()} of a full scan"
+                )
 
         for npc in self.npcs:
             self.total_gold += npc.gold
 
         return self.total_gold
 
+    def _get_market_totals(self, values_name: str, present_name: str) -> dict:
+        if not self.incremental_totals:
+            return self.market_engine.get_totals(values_name, present_name)
+        totals = self.market_engine.get_running_totals(values_name, present_name)
+        if self.check_totals:
+            scanned_totals = self.market_engine.get_totals(values_name, present_name)
+            if totals != scanned_totals:
+                raise RuntimeError(
+                    f"Running totals of {values_name} {totals} differ from "
+                    f"{scanned_totals} of a full scan"
+                )
+        return totals
+
+    @staticmethod
+    def _set_totals(totals: dict, market_totals: dict):
+        # Resources no market has any more keep their key with 0
+        for resource_name in totals.keys():
+            totals[resource_name] = 0
+        totals.update(market_totals)
+
     def calculate_base_prices(self):
         for resource_name, market_share in self.market_share.items():
             self.base_prices[resource_name] = market_share / max(
@@ -164,25 +214,33 @@ class GlobalMarket:
         return self.base_prices
 
     def get_recent_average_production(self, resource_name: ResourceName):
-        return (
-            sum(
-                self.production_history[resource_name][
-                    -self.number_of_ticks_for_average :
-                ]
-            )
-            / self.number_of_ticks_for_average
-        )
+        return self._get_recent_average(self.production_history[resource_name])
 
     def get_recent_average_consumption(self, resource_name: ResourceName):
+        return self._get_recent_average(self.consumption_history[resource_name])
+
+    def _get_recent_average(self, history: list) -> float:
+        if isinstance(history, RollingHistory):
+            return history.get_recent_average(self.number_of_ticks_for_average)
+        # Plain lists assigned from outside are summed like before
         return (
-            sum(
-                self.consumption_history[resource_name][
-                    -self.number_of_ticks_for_average :
-                ]
-            )
+            sum(history[-self.number_of_ticks_for_average :])
             / self.number_of_ticks_for_average
         )
 
+    def _create_rolling_history(self) -> RollingHistory:
+        return RollingHistory(
+            self.number_of_ticks_for_average,
+            dtype=np.int64,
+            capacity=self.history_capacity,
+            tiers=self.history_tiers,
+        )
+
+    def _create_history(self, dtype, values=()) -> BoundedHistory:
+        return BoundedHistory(
+            values, dtype, capacity=self.history_capacity, tiers=self.history_tiers
+        )
+
     def get_proportional_value_for_single_unit(self):
         number_of_units_per_resource = [
             self.price_value_modifiers[resource_name] * ammount
@@ -217,7 +275,50 @@ class GlobalMarket:
         return market_share
 
     def estimate_base_resource_price(self, resource_name: ResourceName):
+        if self._estimated_resources is not None and self._are_modifiers_estimated():
+            resource_id = resource_registry.get_id(resource_name)
+            if self._estimated_resources.item(resource_id):
+                return self.estimated_base_prices.item(resource_id)
         aditional_resource_ammount = defaultdict(int)
         aditional_resource_ammount[resource_name] = 1
         market_share = self.get_market_share(aditional_resource_ammount)
         return market_share[resource_name] / max(1, self.total_amount[resource_name])
+
+    def _are_modifiers_estimated(self) -> bool:
+        if self._estimated_modifiers is None:
+            return False
+        modifiers, version = self._estimated_modifiers
+        return (
+            modifiers is self.price_value_modifiers
+            and version == self.price_value_modifiers.version
+        )
+
+    def estimate_base_resource_prices(self) -> np.ndarray | None:
+        # Closed form of estimate_base_resource_price for every resource at
+        # once, one more unit of r adds modifier r to the total units.
+        # Modifiers replaced by a plain dict can change without notice, so
+        # their prices are estimated one resource at a time on every call.
+        if not isinstance(self.price_value_modifiers, ResourceValues):
+            self.estimated_base_prices = None
+            self._estimated_resources = None
+            self._estimated_modifiers = None
+            return None
+        amounts = np.zeros(len(resource_registry))
+        self._estimated_resources = np.zeros(len(resource_registry), dtype=bool)
+        for resource_name, ammount in self.total_amount.items():
+            resource_id = resource_registry.get_id(resource_name)
+            amounts[resource_id] = ammount
+            self._estimated_resources[resource_id] = True
+        modifiers = self.price_value_modifiers.get_array()[: len(amounts)]
+        units = np.where(self._estimated_resources, modifiers * amounts, 0)
+        total_units = units.sum()
+        self.estimated_base_prices = (
+            (units + modifiers)
+            * (self.total_gold / np.maximum(1, total_units + modifiers))
+            / np.maximum(1, amounts)
+        )
+        self._estimated_modifiers = (
+            self.price_value_modifiers,
+            self.price_value_modifiers.version,
+        )
+        return self.estimated_base_prices
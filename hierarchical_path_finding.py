@@ -0,0 +1,324 @@
+import heapq
+import math
+from collections import defaultdict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from path_finding import astar_flat, movement_cost_grid
+
+
+class HierarchicalPathFinder:
+    def __init__(
+        self,
+        grid: np.ndarray,
+        speed_based: bool = True,
+        cluster_size: int = 32,
+        max_entrance_width: int = 8,
+        abstract_heuristic_weight: float = 1.0,
+        suboptimality_bound: float | None = None,
+    ):
+        self.shape = grid.shape
+        self.cost = movement_cost_grid(grid, speed_based)
+        # With speed based costs non positive speeds mark impassable cells,
+        # entrances are never placed on them
+        self.passable = (grid > 0) if speed_based else np.ones(grid.shape, dtype=bool)
+        self.cluster_size = cluster_size
+        # Smaller entrances give more transition nodes and paths closer to optimal
+        self.max_entrance_width = max_entrance_width
+        # Weight of the abstract search heuristic, the abstract path costs
+        # at most this many times the best path through the entrance graph.
+        # That path can itself cost more than the optimal one, so no bound
+        # against the optimum is guaranteed, even with a weight of 1.
+        self.abstract_heuristic_weight = abstract_heuristic_weight
+        # Paths costing more than this many times the lower bound of the
+        # optimal cost are searched again with the flat A*, so every path is
+        # within the bound of the optimal one. The lower bound is the manhattan
+        # distance times the cheapest cell cost, on varied terrain it is loose
+        # and a bound of 1.25 sends about a quarter of the queries to A*.
+        self.suboptimality_bound = suboptimality_bound
+        self.min_cost = float(self.cost.min())
+
+        rows, cols = self.shape
+        self.cluster_rows = math.ceil(rows / cluster_size)
+        self.cluster_cols = math.ceil(cols / cluster_size)
+
+        self.cluster_nodes: dict[int, list[int]] = defaultdict(list)
+        self.abstract_edges: dict[int, dict[int, float]] = defaultdict(dict)
+
+        self._build_entrances()
+        self._build_intra_cluster_edges()
+
+    @property
+    def number_of_abstract_nodes(self) -> int:
+        return sum(len(nodes) for nodes in self.cluster_nodes.values())
+
+    def get_cluster(self, index: int) -> int:
+        row, col = divmod(index, self.shape[1])
+        return (row // self.cluster_size) * self.cluster_cols + col // self.cluster_size
+
+    def get_cluster_window(self, cluster: int) -> tuple[int, int, int, int]:
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        min_row = cluster_row * self.cluster_size
+        min_col = cluster_col * self.cluster_size
+        max_row = min(self.shape[0], min_row + self.cluster_size)
+        max_col = min(self.shape[1], min_col + self.cluster_size)
+        return min_row, max_row, min_col, max_col
+
+    def find_path(self, start, goal):
+        cols = self.shape[1]
+        path = self.find_flat_path(
+            int(start[0]) * cols + int(start[1]), int(goal[0]) * cols + int(goal[1])
+        )
+        if path is None:
+            return None
+        return [divmod(index, cols) for index in path]
+
+    def find_flat_path(self, start_index: int, goal_index: int):
+        if start_index == goal_index:
+            return [start_index]
+
+        cluster_graphs: dict[int, csr_matrix] = {}
+        start_cluster = self.get_cluster(start_index)
+        goal_cluster = self.get_cluster(goal_index)
+
+        start_edges = {}
+        start_graph = self._get_cluster_graph(start_cluster, cluster_graphs)
+        distances = dijkstra(
+            start_graph,
+            directed=True,
+            indices=self._to_local(start_index, start_cluster),
+        )
+        for node in self.cluster_nodes[start_cluster]:
+            distance = distances[self._to_local(node, start_cluster)]
+            if node != start_index and np.isfinite(distance):
+                start_edges[node] = distance
+        if start_cluster == goal_cluster:
+            distance = distances[self._to_local(goal_index, goal_cluster)]
+            if np.isfinite(distance):
+                start_edges[goal_index] = distance
+
+        goal_edges = {}
+        goal_graph = self._get_cluster_graph(goal_cluster, cluster_graphs)
+        distances = dijkstra(
+            goal_graph.T.tocsr(),
+            directed=True,
+            indices=self._to_local(goal_index, goal_cluster),
+        )
+        for node in self.cluster_nodes[goal_cluster]:
+            distance = distances[self._to_local(node, goal_cluster)]
+            if node != goal_index and np.isfinite(distance):
+                goal_edges[node] = distance
+
+        abstract_path = self._search_abstract_graph(
+            start_index, goal_index, start_edges, goal_edges
+        )
+        if abstract_path is None:
+            # Impassable cells carry no entrances, so a route that has to cross
+            # them is only found by the flat search. That is the case for cells
+            # of 8-connected regions that only touch diagonally, and the flat
+            # search over a large map takes seconds for every such pair.
+            return astar_flat(self.cost, self.shape, start_index, goal_index)
+        path = self._refine_path(abstract_path, cluster_graphs)
+        if self.suboptimality_bound is not None:
+            max_cost = self.suboptimality_bound * self.get_cost_lower_bound(
+                start_index, goal_index
+            )
+            if self.cost[path[1:]].sum() > max_cost:
+                return astar_flat(self.cost, self.shape, start_index, goal_index)
+        return path
+
+    def get_cost_lower_bound(self, start_index: int, goal_index: int) -> float:
+        start_row, start_col = divmod(start_index, self.shape[1])
+        goal_row, goal_col = divmod(goal_index, self.shape[1])
+        return self.min_cost * (abs(start_row - goal_row) + abs(start_col - goal_col))
+
+    def _search_abstract_graph(
+        self,
+        start_index: int,
+        goal_index: int,
+        start_edges: dict[int, float],
+        goal_edges: dict[int, float],
+    ):
+        cols = self.shape[1]
+        goal_row, goal_col = divmod(goal_index, cols)
+        heuristic_weight = self.min_cost * self.abstract_heuristic_weight
+
+        def heuristic(index):
+            row, col = divmod(index, cols)
+            return heuristic_weight * (abs(row - goal_row) + abs(col - goal_col))
+
+        open_set = [(heuristic(start_index), start_index)]
+        g_score = {start_index: 0.0}
+        came_from = {}
+        closed = set()
+
+        while open_set:
+            _, current = heapq.heappop(open_set)
+
+            if current == goal_index:
+                path = [current]
+                while current != start_index:
+                    current = came_from[current]
+                    path.append(current)
+                return path[::-1]
+
+            if current in closed:
+                continue
+            closed.add(current)
+
+            if current == start_index:
+                neighbors = {
+                    **self.abstract_edges.get(start_index, {}),
+                    **start_edges,
+                }.items()
+            else:
+                neighbors = self.abstract_edges[current].items()
+            if current in goal_edges:
+                neighbors = [*neighbors, (goal_index, goal_edges[current])]
+
+            for neighbor, cost in neighbors:
+                tentative_g_score = g_score[current] + cost
+                if tentative_g_score < g_score.get(neighbor, math.inf):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    closed.discard(neighbor)
+                    heapq.heappush(
+                        open_set, (tentative_g_score + heuristic(neighbor), neighbor)
+                    )
+
+        return None  # No path found
+
+    def _refine_path(
+        self, abstract_path: list[int], cluster_graphs: dict[int, csr_matrix]
+    ) -> list[int]:
+        path = [abstract_path[0]]
+        for current, following in zip(abstract_path, abstract_path[1:]):
+            cluster = self.get_cluster(current)
+            if cluster != self.get_cluster(following):
+                # Inter cluster edge between two neighbouring cells
+                path.append(following)
+                continue
+
+            _, predecessors = dijkstra(
+                self._get_cluster_graph(cluster, cluster_graphs),
+                directed=True,
+                indices=self._to_local(current, cluster),
+                return_predecessors=True,
+            )
+            segment = []
+            local_index = self._to_local(following, cluster)
+            local_start = self._to_local(current, cluster)
+            while local_index != local_start:
+                segment.append(self._to_global(local_index, cluster))
+                local_index = predecessors[local_index]
+            path.extend(segment[::-1])
+        return path
+
+    def _build_entrances(self):
+        cost = self.cost.reshape(self.shape)
+        rows, cols = self.shape
+
+        for border_row in range(self.cluster_size, rows, self.cluster_size):
+            open_border = self.passable[border_row - 1] & self.passable[border_row]
+            for min_col in range(0, cols, self.cluster_size):
+                max_col = min(cols, min_col + self.cluster_size)
+                for col in self._get_transition_offsets(open_border[min_col:max_col]):
+                    upper = (border_row - 1) * cols + min_col + col
+                    lower = border_row * cols + min_col + col
+                    self._add_inter_cluster_edge(upper, lower, cost)
+
+        for border_col in range(self.cluster_size, cols, self.cluster_size):
+            open_border = (
+                self.passable[:, border_col - 1] & self.passable[:, border_col]
+            )
+            for min_row in range(0, rows, self.cluster_size):
+                max_row = min(rows, min_row + self.cluster_size)
+                for row in self._get_transition_offsets(open_border[min_row:max_row]):
+                    left = (min_row + row) * cols + border_col - 1
+                    right = (min_row + row) * cols + border_col
+                    self._add_inter_cluster_edge(left, right, cost)
+
+    def _get_transition_offsets(self, open_border: np.ndarray) -> list[int]:
+        transitions = []
+        padded = np.concatenate([[False], open_border, [False]]).astype(np.int8)
+        changes = np.flatnonzero(np.diff(padded))
+        for segment_start, segment_end in zip(changes[::2], changes[1::2]):
+            for chunk_start in range(
+                segment_start, segment_end, self.max_entrance_width
+            ):
+                chunk_end = min(segment_end, chunk_start + self.max_entrance_width)
+                transitions.append(int((chunk_start + chunk_end - 1) // 2))
+        return transitions
+
+    def _add_inter_cluster_edge(self, first: int, second: int, cost: np.ndarray):
+        for node in (first, second):
+            nodes = self.cluster_nodes[self.get_cluster(node)]
+            if node not in nodes:
+                nodes.append(node)
+        cols = self.shape[1]
+        self.abstract_edges[first][second] = float(cost[divmod(second, cols)])
+        self.abstract_edges[second][first] = float(cost[divmod(first, cols)])
+
+    def _build_intra_cluster_edges(self):
+        for cluster, nodes in self.cluster_nodes.items():
+            if len(nodes) < 2:
+                continue
+            local_nodes = [self._to_local(node, cluster) for node in nodes]
+            distances = dijkstra(
+                self._get_cluster_graph(cluster, {}),
+                directed=True,
+                indices=local_nodes,
+            )
+            for i, node in enumerate(nodes):
+                for j, other_node in enumerate(nodes):
+                    if i != j and np.isfinite(distances[i, local_nodes[j]]):
+                        self.abstract_edges[node][other_node] = float(
+                            distances[i, local_nodes[j]]
+                        )
+
+    def _get_cluster_graph(
+        self, cluster: int, cluster_graphs: dict[int, csr_matrix]
+    ) -> csr_matrix:
+        if cluster in cluster_graphs:
+            return cluster_graphs[cluster]
+
+        min_row, max_row, min_col, max_col = self.get_cluster_window(cluster)
+        window_cost = self.cost.reshape(self.shape)[min_row:max_row, min_col:max_col]
+        height, width = window_cost.shape
+        local = np.arange(height * width).reshape(height, width)
+
+        sources = np.concatenate(
+            [
+                local[:, :-1].ravel(),
+                local[:, 1:].ravel(),
+                local[:-1, :].ravel(),
+                local[1:, :].ravel(),
+            ]
+        )
+        targets = np.concatenate(
+            [
+                local[:, 1:].ravel(),
+                local[:, :-1].ravel(),
+                local[1:, :].ravel(),
+                local[:-1, :].ravel(),
+            ]
+        )
+        # Moving into a cell costs the movement cost of that cell
+        graph = csr_matrix(
+            (window_cost.ravel()[targets], (sources, targets)),
+            shape=(height * width, height * width),
+        )
+        cluster_graphs[cluster] = graph
+        return graph
+
+    def _to_local(self, index: int, cluster: int) -> int:
+        min_row, _, min_col, max_col = self.get_cluster_window(cluster)
+        row, col = divmod(index, self.shape[1])
+        return (row - min_row) * (max_col - min_col) + col - min_col
+
+    def _to_global(self, local_index: int, cluster: int) -> int:
+        min_row, _, min_col, max_col = self.get_cluster_window(cluster)
+        row, col = divmod(int(local_index), max_col - min_col)
+        return (min_row + row) * self.shape[1] + min_col + col
@@ -0,0 +1,204 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+# Raw ticks kept for every column, older ticks only survive in the coarser
+# tiers as (ticks per bucket, buckets kept) of min/mean/max buckets
+DEFAULT_HISTORY_CAPACITY = 1024
+DEFAULT_HISTORY_TIERS = ((10, 256), (100, 256))
+INITIAL_HISTORY_CAPACITY = 64
+
+
+class HistoryTier:
+    def __init__(self, factor: int, capacity: int, shape: tuple[int, ...]):
+        self.factor = factor
+        self.capacity = capacity
+        # Last axis is (min, mean, max) of every bucket of factor ticks
+        self.buckets = np.zeros(
+            (min(INITIAL_HISTORY_CAPACITY, capacity), *shape, 3), dtype=float
+        )
+
+
+class TieredHistory:
+    def __init__(
+        self,
+        shape: tuple[int, ...],
+        dtype=float,
+        capacity: int = DEFAULT_HISTORY_CAPACITY,
+        tiers: tuple[tuple[int, int], ...] = DEFAULT_HISTORY_TIERS,
+    ):
+        # Ring buffers of one value per tick for every column of shape, they
+        # grow by doubling up to capacity and then overwrite the oldest tick,
+        # so memory stays bounded however long the simulation runs
+        previous_factor, previous_capacity = 1, capacity
+        for factor, tier_capacity in tiers:
+            if factor % previous_factor or factor // previous_factor > (
+                previous_capacity
+            ):
+                raise ValueError(
+                    f"A tier of {factor} ticks can't be built from buckets of "
+                    f"{previous_factor} ticks with {previous_capacity} kept"
+                )
+            previous_factor, previous_capacity = factor, tier_capacity
+
+        self.shape = tuple(shape)
+        self.capacity = capacity
+        self.values = np.zeros(
+            (min(INITIAL_HISTORY_CAPACITY, capacity), *self.shape), dtype=dtype
+        )
+        # Ticks appended to every column, including the ones overwritten
+        self.lengths = np.zeros(self.shape, dtype=np.int64)
+        self.tiers = [
+            HistoryTier(factor, tier_capacity, self.shape)
+            for factor, tier_capacity in tiers
+        ]
+
+    def append(self, index: tuple, values: np.ndarray):
+        # index selects the columns, e.g. (market_indices, resource_index)
+        index = tuple(np.broadcast_arrays(*index))
+        lengths = self.lengths[index]
+        if not lengths.size:
+            return
+        self.values = _reserve(self.values, self.capacity, lengths.max() + 1)
+        self.values[(lengths % len(self.values),) + index] = values
+        lengths += 1
+        self.lengths[index] = lengths
+        self._downsample(index, lengths)
+
+    def append_value(self, column: tuple[int, ...], value):
+        # Single column fast path for the per resource histories
+        length = self.lengths.item(column)
+        self.values = _reserve(self.values, self.capacity, length + 1)
+        self.values[(length % len(self.values),) + column] = value
+        self.lengths[column] = length + 1
+        if self.tiers and (length + 1) % self.tiers[0].factor == 0:
+            self._downsample(
+                tuple(np.array([position]) for position in column),
+                np.array([length + 1]),
+            )
+
+    def get_retained_lengths(self, index: tuple = ()) -> np.ndarray:
+        return np.minimum(self.lengths[index], self.capacity)
+
+    def get(self, column: tuple[int, ...]) -> np.ndarray:
+        # Every raw value still kept for the column, oldest first
+        length = self.lengths.item(column)
+        kept = min(length, self.capacity)
+        positions = np.arange(length - kept, length) % len(self.values)
+        return self.values[(positions,) + column]
+
+    def get_recent(self, index: tuple, ticks_back) -> np.ndarray:
+        # Value ticks_back ticks before the end of every column, it has to be
+        # one of the kept ones
+        positions = (self.lengths[index] - ticks_back) % len(self.values)
+        return self.values[(positions,) + index]
+
+    def get_tier(self, level: int, column: tuple[int, ...]) -> np.ndarray:
+        # (min, mean, max) rows of every bucket of the tier still kept
+        tier = self.tiers[level]
+        length = self.lengths.item(column) // tier.factor
+        kept = min(length, tier.capacity)
+        positions = np.arange(length - kept, length) % len(tier.buckets)
+        return tier.buckets[(positions,) + column]
+
+    def set(self, column: tuple[int, ...], values: list):
+        self.lengths[column] = 0
+        for value in values:
+            self.append_value(column, value)
+
+    def grow(self, axis: int, size: int):
+        # Grows the column axis to size, the new columns are empty
+        self.shape = self.shape[:axis] + (size,) + self.shape[axis + 1 :]
+        self.lengths = _resize_axis(self.lengths, axis, size)
+        self.values = _resize_axis(self.values, axis + 1, size)
+        for tier in self.tiers:
+            tier.buckets = _resize_axis(tier.buckets, axis + 1, size)
+
+    def _downsample(self, index: tuple, lengths: np.ndarray):
+        # Every column that just filled a bucket of a tier gets it summarized
+        # from the last buckets of the tier below
+        previous_factor = 1
+        for tier_level, tier in enumerate(self.tiers):
+            completed = lengths % tier.factor == 0
+            if not completed.any():
+                return
+            index = tuple(position[completed] for position in index)
+            lengths = lengths[completed]
+
+            step = tier.factor // previous_factor
+            source_positions = (lengths // previous_factor)[:, None] + np.arange(
+                -step, 0
+            )
+            source_index = tuple(position[:, None] for position in index)
+            if tier_level == 0:
+                source = self.values[
+                    (source_positions % len(self.values),) + source_index
+                ]
+                minimum, mean, maximum = (
+                    source.min(axis=1),
+                    source.mean(axis=1),
+                    source.max(axis=1),
+                )
+            else:
+                previous_buckets = self.tiers[tier_level - 1].buckets
+                source = previous_buckets[
+                    (source_positions % len(previous_buckets),) + source_index
+                ]
+                minimum, mean, maximum = (
+                    source[..., 0].min(axis=1),
+                    source[..., 1].mean(axis=1),
+                    source[..., 2].max(axis=1),
+                )
+
+            bucket_positions = lengths // tier.factor
+            tier.buckets = _reserve(tier.buckets, tier.capacity, bucket_positions.max())
+            tier.buckets[((bucket_positions - 1) % len(tier.buckets),) + index] = (
+                np.stack((minimum, mean, maximum), axis=-1)
+            )
+            previous_factor = tier.factor
+
+
+def _reserve(buffer: np.ndarray, capacity: int, length: int) -> np.ndarray:
+    # Doubles the tick axis until length fits, no column wraps around before
+    # the buffer reached capacity so the values keep their positions
+    size = len(buffer)
+    if length <= size or size == capacity:
+        return buffer
+    while size < length and size < capacity:
+        size = min(2 * size, capacity)
+    return _resize_axis(buffer, 0, size)
+
+
+def _resize_axis(array: np.ndarray, axis: int, size: int) -> np.ndarray:
+    padding = [(0, 0)] * array.ndim
+    padding[axis] = (0, size - array.shape[axis])
+    return np.pad(array, padding)
+
+
+class BoundedHistory(Sequence):
+    # List like history of a single value per tick, kept in a TieredHistory
+    def __init__(
+        self,
+        values=(),
+        dtype=float,
+        capacity: int = DEFAULT_HISTORY_CAPACITY,
+        tiers: tuple[tuple[int, int], ...] = DEFAULT_HISTORY_TIERS,
+    ):
+        self.store = TieredHistory((1,), dtype, capacity, tiers)
+        self.store.set((0,), values)
+
+    def __getitem__(self, index):
+        values = self.store.get((0,))[index]
+        return values.tolist() if isinstance(index, slice) else values.item()
+
+    def __len__(self):
+        return int(self.store.get_retained_lengths((0,)))
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def append(self, value):
+        self.store.append_value((0,), value)
+
+    def get_tier(self, level: int) -> np.ndarray:
+        return self.store.get_tier(level, (0,))
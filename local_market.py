@@ -1,4 +1,4 @@
-from collections import defaultdict
+from market_engine import MarketHistory, MarketResources, MarketValues
 from resources import ResourceName, Resource
 
 
@@ -9,46 +9,77 @@ class LocalMarket:
         self.global_market = global_market
         self.global_market.local_markets.append(self)
 
-        self.resources = resources
+        # The market state lives in the arrays of the shared market engine,
+        # the attributes below are views of this market's row
+        self.market_engine = self.global_market.market_engine
+        self.market_index = self.market_engine.add_market(resources)
+
+        self.resources = MarketResources(self.market_engine, self.market_index)
         self.gold = 5000
         self.price_change_factor = 5
         self.number_of_ticks_for_average = 20
 
-        self.produced_resources = defaultdict(int)
-        self.consumed_resources = defaultdict(int)
+        self.produced_resources = MarketValues(
+            self.market_engine, "produced", "has_produced", self.market_index
+        )
+        self.consumed_resources = MarketValues(
+            self.market_engine, "consumed", "has_consumed", self.market_index
+        )
 
         # Price data
-        self.base_prices = defaultdict(int)
-        self.current_price = defaultdict(int)
-        self.price_history = defaultdict(list)
+        self.current_price = MarketValues(
+            self.market_engine, "prices", "has_price", self.market_index
+        )
+        self.price_history = MarketHistory(
+            self.market_engine, "price", self.market_index
+        )
 
         # History tracking
-        self.consumption_history = defaultdict(list)
-        self.production_history = defaultdict(list)
-        self.amount_history = defaultdict(list)
+        self.consumption_history = MarketHistory(
+            self.market_engine, "consumption", self.market_index
+        )
+        self.production_history = MarketHistory(
+            self.market_engine, "production", self.market_index
+        )
+        self.amount_history = MarketHistory(
+            self.market_engine, "amount", self.market_index
+        )
 
         self.base_prices = self.global_market.current_price
         self.current_price[ResourceName.Iron] = self.base_prices[ResourceName.Iron]
         self.price_history[ResourceName.Iron] = [self.current_price[ResourceName.Iron]]
 
+    @property
+    def gold(self) -> float:
+        return self.market_engine.gold[self.market_index].item()
+
+    @gold.setter
+    def gold(self, gold: float):
+        self.market_engine.set_gold(self.market_index, gold)
+
+    @property
+    def price_change_factor(self) -> float:
+        return self.market_engine.price_change_factor[self.market_index].item()
+
+    @price_change_factor.setter
+    def price_change_factor(self, price_change_factor: float):
+        self.market_engine.price_change_factor[self.market_index] = price_change_factor
+
+    @property
+    def number_of_ticks_for_average(self) -> int:
+        return self.market_engine.ticks_for_average[self.market_index].item()
+
+    @number_of_ticks_for_average.setter
+    def number_of_ticks_for_average(self, number_of_ticks_for_average: int):
+        self.market_engine.set_ticks_for_average(
+            self.market_index, number_of_ticks_for_average
+        )
+
     def update_prices(self):
         self.base_prices = self.global_market.current_price
 
         # Update prices and history
-        for resource_name in self.base_prices.keys():
-            self.current_price[resource_name] = self.get_resource_price(resource_name)
-            self.price_history[resource_name].append(self.current_price[resource_name])
-
-            # Update history
-            self.consumption_history[resource_name].append(
-                self.consumed_resources[resource_name]
-            )
-            self.production_history[resource_name].append(
-                self.produced_resources[resource_name]
-            )
-            self.amount_history[resource_name].append(
-                self.resources[resource_name].amount
-            )
+        self.market_engine.update_prices(self.base_prices, [self.market_index])
 
     def get_resource_price(self, resource_name: ResourceName) -> int:
         """Calculate the current price for a resource"""
@@ -73,31 +104,20 @@ class LocalMarket:
         )
 
     def add_produced_resource(self, resource_name: ResourceName, amount: int):
-        self.resources[resource_name].amount += amount
-        self.produced_resources[resource_name] = amount
+        self.market_engine.add_produced(self.market_index, resource_name, amount)
 
     def remove_consumed_resource(self, resource_name: ResourceName, amount: int):
-        # Ensure we don't consume more than available
-        actual_consumption = min(amount, self.resources[resource_name].amount)
-        self.resources[resource_name].amount -= actual_consumption
-        self.consumed_resources[resource_name] = actual_consumption
+        self.market_engine.remove_consumed(self.market_index, resource_name, amount)
 
     def get_recent_average_production(self, resource_name: ResourceName):
-        return (
-            sum(
-                self.production_history[resource_name][
-                    -self.number_of_ticks_for_average :
-                ]
-            )
-            / self.number_of_ticks_for_average
-        )
+        return self._get_recent_average("production", resource_name)
 
     def get_recent_average_consumption(self, resource_name: ResourceName):
-        return (
-            sum(
-                self.consumption_history[resource_name][
-                    -self.number_of_ticks_for_average :
-                ]
-            )
-            / self.number_of_ticks_for_average
-        )
+        return self._get_recent_average("consumption", resource_name)
+
+    def _get_recent_average(self, metric: str, resource_name: ResourceName) -> float:
+        return self.market_engine.get_recent_average(
+            metric,
+            self.market_engine.get_resource_index(resource_name),
+            [self.market_index],
+        ).item()
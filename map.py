@@ -7,31 +7,105 @@ from sklearn.preprocessing import MinMaxScaler
 from sklearn.neighbors import kneighbors_graph
 from path_finding import (
     astar,
-    find_closest_point,
+    astar_flat,
+    movement_cost_grid,
+    NearestPointIndex,
     find_edges,
+    grid_poisson_disk_points,
     select_evenly_spaced_points,
     sum_neighbours,
     uniformly_spaced_points,
 )
 from perlin_noise import generate_fractal_noise_2d
+from world_chunks import classify_terrain
+from flow_accumulation import accumulate_flow_d8, accumulate_rain, get_flow_targets
 from city import City
 from scipy.spatial import Delaunay
 from scipy.ndimage import label
 from city_connector import CityConnector
+from hierarchical_path_finding import HierarchicalPathFinder
+from path_cache import PathCache
+from map_pipeline import MapPipeline, MapStage
+
+MAP_STAGES = {
+    stage.name: stage
+    for stage in [
+        MapStage(
+            "noise",
+            parameters=["seed", "map_shape", "noise_resolution", "noise_octaves"],
+            inputs=[],
+            outputs=["terrain_noise"],
+            uses_random=True,
+        ),
+        MapStage(
+            "terrain_types",
+            parameters=["sea_level", "mointain_peak"],
+            inputs=["noise"],
+            outputs=["terrain_type_map", "water_map"],
+        ),
+        MapStage(
+            "accumulation",
+            parameters=["sea_level", "water_flow_mode"],
+            inputs=["noise"],
+            outputs=["water_acumulation_map"],
+        ),
+        MapStage(
+            "rivers",
+            parameters=["mointain_peak", "rivers_density", "rivers_routing"],
+            inputs=["noise", "terrain_types", "accumulation"],
+            outputs=["river_map"],
+        ),
+        MapStage(
+            "cities",
+            parameters=[
+                "seed",
+                "city_distance",
+                "city_candidates",
+                "city_propability_mapping",
+            ],
+            # The noise stage also fixes the np.random state the cities draw from
+            inputs=["noise", "terrain_types", "rivers"],
+            outputs=["city_positions"],
+            uses_random=True,
+        ),
+        MapStage(
+            "roads",
+            parameters=[
+                "land_travel_speed_mapping",
+                "water_travel_speed_mapping",
+                "city_water_distance",
+                "roads_routing",
+            ],
+            inputs=["terrain_types", "rivers", "cities"],
+            outputs=[
+                "cities_connections_land_regions_map",
+                "cities_connections_water_regions_map",
+            ],
+        ),
+    ]
+}
 
 
 class GameMap:
     def __init__(
-        self, city_factory: CityFactory, city_connector: CityConnector, seed=2137
+        self,
+        city_factory: CityFactory,
+        city_connector: CityConnector,
+        seed=2137,
+        path_cache: PathCache | None = None,
+        map_pipeline: MapPipeline | None = None,
     ):
         np.random.seed(seed)
         self.seed = seed
+        self.path_cache = path_cache
         self.city_connector = city_connector
         self.city_factory = city_factory
         self.cities: dict[str, City] = {}
 
         # self.terrain_noise = generate_fractal_noise_2d((64, 64), (2, 2), 3)
-        self.terrain_noise = generate_fractal_noise_2d((512, 512), (4, 4), 5)
+        self.map_shape = (512, 512)
+        self.noise_resolution = (4, 4)
+        self.noise_octaves = 5
 
         # 0 - DEEP_WATER, city probalility = 0.0
         # 1 - SHALLOW_WATER, city probalility = 0.3
@@ -50,32 +124,61 @@ class GameMap:
             [2, 2, -1, -1, -1, -1, -1, -1]
         )  # max value 2
         self.city_distance = 20
+        # "poisson" samples city candidates until the map is saturated,
+        # "grid" draws them in vectorized rounds on a background grid and
+        # scales to large maps
+        self.city_candidates = "poisson"
 
         self.sea_level = -0.2
         self.mointain_peak = 0.9
 
         self.rivers_density = 0.1
-        self.terrain_type_map = self.get_terrain_type_map()
-        self.water_map = self.get_water_map()
-        self.water_acumulation_map = self.get_water_acumulation()
-        self.river_map = self.get_rivers_map()
+        # "last_writer" keeps the original rain movement where the last cell
+        # draining into a cell overwrites its water, "additive" sums all inflows,
+        # "d8" is the full upstream accumulation computed in a single pass
+        self.water_flow_mode = "last_writer"
+        # "astar" or "hierarchical" (HPA*, faster on large maps)
+        self.rivers_routing = "astar"
+        self.map_pipeline = map_pipeline or MapPipeline()
+        self.generate()
+
+    def generate(self):
+        # Every stage is memoized on its own parameters and input stages, so
+        # after tuning a parameter only the stages depending on it run again
+        np.random.seed(self.seed)
+        parameters = self.get_generation_parameters()
+        stage_keys: dict[str, str] = {}
+
+        def run_stage(name, generate):
+            return self.map_pipeline.run_stage(
+                MAP_STAGES[name], parameters, stage_keys, generate
+            )
+
+        (self.terrain_noise,) = run_stage("noise", self.generate_terrain_noise)
+        self.terrain_type_map, self.water_map = run_stage(
+            "terrain_types", lambda: (self.get_terrain_type_map(), self.get_water_map())
+        )
+        (self.water_acumulation_map,) = run_stage(
+            "accumulation", self.get_water_acumulation
+        )
+        (self.river_map,) = run_stage("rivers", self.get_rivers_map)
         self.terrain_type_map = np.where(
             self.river_map == 7, self.river_map, self.terrain_type_map
         )
-        self.city_positions = self.generate_city_positions()
-        self.cities_connections_land_regions_map = (
-            self.city_connector.generate_cities_connections_land_regions(
+        (self.city_positions,) = run_stage("cities", self.generate_city_positions)
+        self.cities.clear()
+        self.add_cities(self.city_positions)
+        (
+            self.cities_connections_land_regions_map,
+            self.cities_connections_water_regions_map,
+        ) = run_stage(
+            "roads",
+            lambda: self.city_connector.generate_cities_connections(
                 self.city_positions,
                 self.terrain_type_map,
                 self.land_travel_speed_mapping,
-            )
-        )
-        self.cities_connections_water_regions_map = (
-            self.city_connector.generate_cities_connections_water_regions(
-                self.city_positions,
-                self.terrain_type_map,
                 self.water_travel_speed_mapping,
-            )
+            ),
         )
         self.terrain_type_map = np.where(
             self.cities_connections_land_regions_map == 8,
@@ -91,15 +194,40 @@ class GameMap:
     def add_city(self, city: City):
         self.cities[city.position] = city
 
-    def get_terrain_type_map(self):
-        return (
-            np.digitize(
-                self.terrain_noise,
-                [-1.1, -0.6, self.sea_level, -0.1, 0.3, 0.7, self.mointain_peak, 1.1],
-            )
-            - 1
+    def add_cities(self, city_positions: np.ndarray):
+        for position in city_positions:
+            city = self.city_factory.create_city(position=tuple(position.astype(int)))
+            self.add_city(city)
+
+    def get_generation_parameters(self) -> dict:
+        return {
+            "seed": self.seed,
+            "map_shape": self.map_shape,
+            "noise_resolution": self.noise_resolution,
+            "noise_octaves": self.noise_octaves,
+            "sea_level": self.sea_level,
+            "mointain_peak": self.mointain_peak,
+            "water_flow_mode": self.water_flow_mode,
+            "rivers_density": self.rivers_density,
+            "rivers_routing": self.rivers_routing,
+            "city_distance": self.city_distance,
+            "city_candidates": self.city_candidates,
+            "city_propability_mapping": self.city_propability_mapping,
+            "land_travel_speed_mapping": self.land_travel_speed_mapping,
+            "water_travel_speed_mapping": self.water_travel_speed_mapping,
+            "city_water_distance": self.city_connector.city_water_distance,
+            "roads_routing": self.city_connector.routing,
+        }
+
+    def generate_terrain_noise(self):
+        np.random.seed(self.seed)
+        return generate_fractal_noise_2d(
+            self.map_shape, self.noise_resolution, self.noise_octaves
         )
 
+    def get_terrain_type_map(self):
+        return classify_terrain(self.terrain_noise, self.sea_level, self.mointain_peak)
+
     def get_water_map(self):
         return np.where(self.terrain_noise < self.sea_level, 1, 0)
 
@@ -107,14 +235,20 @@ class GameMap:
         return np.where(self.terrain_noise > self.mointain_peak, 1, 0)
 
     def get_water_acumulation(self):
-        dA_dx, dA_dy = np.gradient(self.terrain_noise)
-
-        height, width = dA_dx.shape
-        accumulation = np.ones_like(dA_dx)
+        index_shifts = self.get_water_flow_index_shifts()
+        flow_targets = get_flow_targets(index_shifts)
+        if self.water_flow_mode == "d8":
+            return accumulate_flow_d8(flow_targets, self.terrain_noise.shape)
+        return accumulate_rain(
+            flow_targets,
+            self.terrain_noise.shape,
+            iterations=30,
+            last_writer_wins=self.water_flow_mode == "last_writer",
+        )
 
-        magnitude = np.sqrt(dA_dx**2 + dA_dy**2)
+    def get_water_flow_index_shifts(self):
+        dA_dx, dA_dy = np.gradient(self.terrain_noise)
 
-        directions = np.zeros((height, width), dtype=int)
         angles = np.arctan2(dA_dx, dA_dy) + np.pi
 
         # Define angle ranges (pi/4 = 45° per section)
@@ -126,21 +260,21 @@ class GameMap:
         # Ensure values wrap correctly
         angle_indices = np.mod(angle_indices, 8)  # Ensure valid indices
 
-        directions = [
-            (1, 0),  # Down
-            (1, -1),  # Down-Left
-            (0, -1),  # Left
-            (-1, -1),  # Up-Left
-            (-1, 0),  # Up
-            (-1, 1),  # Up-Right
-            (0, 1),  # Right
-            (1, 1),  # Down-Right
-        ]
+        directions = np.array(
+            [
+                (1, 0),  # Down
+                (1, -1),  # Down-Left
+                (0, -1),  # Left
+                (-1, -1),  # Up-Left
+                (-1, 0),  # Up
+                (-1, 1),  # Up-Right
+                (0, 1),  # Right
+                (1, 1),  # Down-Right
+            ]
+        )
 
         # Map angle indices to direction vectors (apply to each element)
-        index_shifts = np.array(
-            [directions[i] for i in angle_indices.flatten()]
-        ).reshape(angle_indices.shape + (2,))
+        index_shifts = directions[angle_indices]
 
         magnitude = np.sqrt(dA_dx**2 + dA_dy**2)
         # forces water to flow from high ground even if there is flat ground
@@ -148,28 +282,7 @@ class GameMap:
         magnitude = np.stack([magnitude, magnitude], axis=-1)
 
         zeros = np.full(index_shifts.shape, np.array([0, 0]))
-        index_shifts = np.where(magnitude < 0.35, index_shifts, zeros)
-
-        for _ in range(30):
-            rain = np.ones_like(accumulation)
-            current_water = accumulation + rain
-            rain_movement = np.zeros_like(accumulation)
-            for i in range(rain_movement.shape[0]):
-                for j in range(rain_movement.shape[1]):
-                    rain_shift = index_shifts[i, j]
-                    next_rain_postion_i = min(
-                        rain_movement.shape[0] - 1, max(0, i + rain_shift[0])
-                    )
-                    next_rain_postion_j = min(
-                        rain_movement.shape[1] - 1, max(0, j + rain_shift[1])
-                    )
-                    rain_movement[next_rain_postion_i, next_rain_postion_j] = (
-                        current_water[i, j]
-                    )
-
-            accumulation = rain_movement
-
-        return accumulation
+        return np.where(magnitude < 0.35, index_shifts, zeros)
 
     def get_rivers_map(self):
         number_of_rivers = int(
@@ -181,15 +294,38 @@ class GameMap:
         )
         print(f"Genereted {rivers_source_location.shape[0]} rivers")
         rivers_map = np.zeros_like(self.terrain_noise)
+        movement_cost = movement_cost_grid(self.water_acumulation_map, speed_based=True)
+        cols = rivers_map.shape[1]
+        path_finder = None
+        cache_mode = f"{self.rivers_routing}_speed_based"
+        if self.path_cache is not None:
+            fingerprint = PathCache.fingerprint(self.water_acumulation_map)
+        nearest_water = NearestPointIndex(self.water_map)
         for river_source in rivers_source_location:
-            river_delta = tuple(find_closest_point(self.water_map, river_source))
-            river_course = astar(
-                self.water_acumulation_map,
-                tuple(river_source),
-                river_delta,
-                speed_based=True,
-            )
-            rivers_map[tuple(np.array(river_course).T)] = 7
+            river_delta = nearest_water.query(river_source)
+            start_index = int(river_source[0]) * cols + int(river_source[1])
+            goal_index = int(river_delta[0]) * cols + int(river_delta[1])
+            river_course = None
+            if self.path_cache is not None:
+                river_course = self.path_cache.get(
+                    fingerprint, start_index, goal_index, cache_mode
+                )
+            if river_course is None:
+                if self.rivers_routing == "hierarchical":
+                    if path_finder is None:
+                        path_finder = HierarchicalPathFinder(
+                            self.water_acumulation_map, speed_based=True
+                        )
+                    river_course = path_finder.find_flat_path(start_index, goal_index)
+                else:
+                    river_course = astar_flat(
+                        movement_cost, rivers_map.shape, start_index, goal_index
+                    )
+                if self.path_cache is not None:
+                    self.path_cache.put(
+                        fingerprint, start_index, goal_index, cache_mode, river_course
+                    )
+            rivers_map[np.unravel_index(river_course, rivers_map.shape)] = 7
         return rivers_map.astype(np.int8)
 
     def generate_city_positions(self):
@@ -206,25 +342,21 @@ class GameMap:
 
         drawn_chance = np.random.rand(*city_propability.shape)
 
-        proposed_positions = uniformly_spaced_points(
-            city_propability.shape[0] - 1,
-            self.city_distance,
-            np.iinfo(np.int16).max,
-            self.seed,
-        )
+        if self.city_candidates == "grid":
+            proposed_positions = grid_poisson_disk_points(
+                city_propability.shape[0] - 1, self.city_distance, self.seed
+            )
+        else:
+            proposed_positions = uniformly_spaced_points(
+                city_propability.shape[0] - 1, self.city_distance, None, self.seed
+            )
 
         selected_city_positions = (
             drawn_chance[tuple(proposed_positions.T)]
             < city_propability[tuple(proposed_positions.T)]
         )
 
-        generated_positions = proposed_positions[selected_city_positions]
-
-        for position in generated_positions:
-            city = self.city_factory.create_city(position=tuple(position.astype(int)))
-            self.add_city(city)
-
-        return generated_positions
+        return proposed_positions[selected_city_positions]
 
     def generate_cities_connections(self):
         triangulation = Delaunay(self.city_positions)
@@ -0,0 +1,96 @@
+import numpy as np
+
+from world_cache import WorldArtifactCache
+
+
+class MapStage:
+    def __init__(
+        self,
+        name: str,
+        parameters: list[str],
+        inputs: list[str],
+        outputs: list[str],
+        uses_random: bool = False,
+    ):
+        self.name = name
+        # Names of GameMap attributes the stage reads
+        self.parameters = parameters
+        # Names of the stages whose outputs the stage reads
+        self.inputs = inputs
+        self.outputs = outputs
+        # The stage draws from np.random, the generator state after it is
+        # stored with its outputs
+        self.uses_random = uses_random
+
+
+class MapPipeline:
+    def __init__(self, world_cache: WorldArtifactCache | None = None):
+        self.world_cache = world_cache
+        self.computed_stages: list[str] = []
+        # Outputs of the last run of every stage by stage name, older runs
+        # are only kept by the world cache
+        self._memo: dict[str, tuple[str, tuple[np.ndarray, ...], tuple | None]] = {}
+
+    def get_stage_key(
+        self, stage: MapStage, parameters: dict, stage_keys: dict[str, str]
+    ) -> str:
+        return WorldArtifactCache.get_key(
+            {
+                "stage": stage.name,
+                "parameters": {name: parameters[name] for name in stage.parameters},
+                "inputs": [stage_keys[name] for name in stage.inputs],
+            }
+        )
+
+    def run_stage(
+        self,
+        stage: MapStage,
+        parameters: dict,
+        stage_keys: dict[str, str],
+        generate,
+    ) -> tuple[np.ndarray, ...]:
+        key = self.get_stage_key(stage, parameters, stage_keys)
+        stage_keys[stage.name] = key
+
+        memo_key, outputs, random_state = self._memo.get(stage.name, (None, None, None))
+        if memo_key == key:
+            if random_state is not None:
+                np.random.set_state(random_state)
+            return outputs
+
+        outputs = self._load_stage(stage, key)
+        if outputs is None:
+            outputs = generate()
+            if len(stage.outputs) == 1:
+                outputs = (outputs,)
+            self.computed_stages.append(stage.name)
+            self._save_stage(stage, key, outputs)
+
+        self._memo[stage.name] = (
+            key,
+            outputs,
+            np.random.get_state() if stage.uses_random else None,
+        )
+        return outputs
+
+    def _load_stage(self, stage: MapStage, key: str) -> tuple[np.ndarray, ...] | None:
+        if self.world_cache is None:
+            return None
+
+        outputs = tuple(self.world_cache.load(key, name) for name in stage.outputs)
+        if any(output is None for output in outputs):
+            return None
+        if stage.uses_random and not self.world_cache.load_random_state(
+            key, stage.name
+        ):
+            return None
+        return outputs
+
+    def _save_stage(self, stage: MapStage, key: str, outputs: tuple[np.ndarray, ...]):
+        if self.world_cache is None:
+            return
+
+        for name, output in zip(stage.outputs, outputs):
+            self.world_cache.save(key, name, output)
+        if stage.uses_random:
+            self.world_cache.save_random_state(key, stage.name)
@@ -0,0 +1,619 @@
+from collections.abc import Mapping, MutableMapping, Sequence
+
+import numpy as np
+from history_store import (
+    DEFAULT_HISTORY_CAPACITY,
+    DEFAULT_HISTORY_TIERS,
+    TieredHistory,
+)
+from resources import Resource, ResourceName, ResourceRegistry, resource_registry
+
+HISTORY_METRICS = ("price", "consumption", "production", "amount")
+# Values the global market sums over all markets and their presence masks
+TOTALED_VALUES = ("amounts", "produced", "consumed")
+PRESENCE_MASKS = ("has_amount", "has_produced", "has_consumed", "has_price")
+# (markets x resources) arrays of the market state
+MARKET_RESOURCE_ARRAYS = ("amounts", "produced", "consumed", "prices", *PRESENCE_MASKS)
+# Metrics whose recent average prices depend on, kept as running window sums
+AVERAGED_METRICS = ("consumption", "production")
+
+
+class MarketEngine:
+    def __init__(
+        self,
+        market_capacity: int = 64,
+        history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+        history_tiers: tuple[tuple[int, int], ...] = DEFAULT_HISTORY_TIERS,
+        registry: ResourceRegistry = resource_registry,
+    ):
+        # State of all local markets as (markets x resources) arrays, LocalMarket
+        # and its dict like attributes are views into a row of them. Columns
+        # are resource ids of the registry, resources registered later add
+        # columns when they are first used.
+        self.registry = registry
+        self.resource_capacity = max(len(registry), 1)
+        self.number_of_markets = 0
+        self.market_capacity = market_capacity
+        self.history_capacity = history_capacity
+
+        shape = (market_capacity, self.resource_capacity)
+        self.amounts = np.zeros(shape, dtype=np.int64)
+        self.produced = np.zeros(shape, dtype=np.int64)
+        self.consumed = np.zeros(shape, dtype=np.int64)
+        self.prices = np.zeros(shape)
+        # Resources every market has a value for, the keys of the old dicts
+        self.has_amount = np.zeros(shape, dtype=bool)
+        self.has_produced = np.zeros(shape, dtype=bool)
+        self.has_consumed = np.zeros(shape, dtype=bool)
+        self.has_price = np.zeros(shape, dtype=bool)
+
+        self.gold = np.zeros(market_capacity)
+        self.price_change_factor = np.zeros(market_capacity)
+        self.ticks_for_average = np.zeros(market_capacity, dtype=np.int64)
+
+        # Sums over all markets and number of markets having every resource,
+        # every write below keeps them up to date so the global market reads
+        # them without scanning the markets
+        self.totals = {
+            values_name: np.zeros(self.resource_capacity, dtype=np.int64)
+            for values_name in TOTALED_VALUES
+        }
+        self.present_counts = {
+            present_name: np.zeros(self.resource_capacity, dtype=np.int64)
+            for present_name in PRESENCE_MASKS
+        }
+        self.total_gold = 0.0
+
+        # Every market appends to its own (market, resource) column, so
+        # markets added later or updated on their own keep their own length.
+        # Only the last history_capacity ticks are kept as they are, older
+        # ones as min/mean/max of every history_tiers bucket.
+        self.history = {
+            metric: TieredHistory(
+                shape,
+                float if metric == "price" else np.int64,
+                history_capacity,
+                history_tiers,
+            )
+            for metric in HISTORY_METRICS
+        }
+        # Sum of the last ticks_for_average entries of every history column,
+        # updated on every append so averages cost O(1) for any window
+        self.window_sums = {
+            metric: np.zeros(shape, dtype=np.int64) for metric in AVERAGED_METRICS
+        }
+
+    def get_resource_index(self, resource_name) -> int:
+        resource_index = self.registry.get_id(resource_name)
+        if resource_index >= self.resource_capacity:
+            self._grow_resources(resource_index + 1)
+        return resource_index
+
+    def get_resources(self) -> list[tuple[str, int]]:
+        # Resources with a column, the ones registered since have no data yet
+        return [
+            (resource_name, resource_index)
+            for resource_index, resource_name in enumerate(
+                self.registry.resource_names[: self.resource_capacity]
+            )
+        ]
+
+    def add_market(self, resources: dict[ResourceName, Resource]) -> int:
+        if self.number_of_markets == self.market_capacity:
+            self._grow_markets()
+        market_index = self.number_of_markets
+        self.number_of_markets += 1
+        for resource_name, resource in resources.items():
+            resource_index = self.get_resource_index(resource_name)
+            self.set_value("amounts", market_index, resource_index, resource.amount)
+            self.set_present("has_amount", market_index, resource_index)
+        return market_index
+
+    def update_prices(
+        self, base_prices: dict[ResourceName, float], market_indices=None
+    ):
+        if market_indices is None:
+            market_indices = np.arange(self.number_of_markets)
+        market_indices = np.asarray(market_indices)
+
+        for resource_name, base_price in base_prices.items():
+            resource_index = self.get_resource_index(resource_name)
+            demand = self.get_recent_average(
+                "consumption", resource_index, market_indices
+            )
+            supply = (
+                self.get_recent_average("production", resource_index, market_indices)
+                + self.amounts[market_indices, resource_index]
+            )
+            self.prices[market_indices, resource_index] = np.trunc(
+                base_price
+                * (
+                    1
+                    + self.price_change_factor[market_indices] * (demand / (supply + 1))
+                )
+            )
+            for present_name in ("has_price", "has_consumed", "has_produced"):
+                self.set_present_many(present_name, market_indices, resource_index)
+
+            for metric, values in (
+                ("price", self.prices),
+                ("consumption", self.consumed),
+                ("production", self.produced),
+                ("amount", self.amounts),
+            ):
+                self.append_history(
+                    metric,
+                    market_indices,
+                    resource_index,
+                    values[market_indices, resource_index],
+                )
+
+    def get_recent_average(
+        self, metric: str, resource_index: int, market_indices: np.ndarray
+    ) -> np.ndarray:
+        market_indices = np.asarray(market_indices)
+        if metric in self.window_sums:
+            window_sums = self.window_sums[metric][market_indices, resource_index]
+        else:
+            window_sums = self._sum_recent(metric, resource_index, market_indices)
+        return window_sums / self.ticks_for_average[market_indices]
+
+    def set_ticks_for_average(self, market_index: int, ticks_for_average: int):
+        if ticks_for_average > self.history_capacity:
+            raise ValueError(
+                f"Can't average {ticks_for_average} ticks, only "
+                f"{self.history_capacity} ticks of history are kept"
+            )
+        self.ticks_for_average[market_index] = ticks_for_average
+        for _, resource_index in self.get_resources():
+            self._update_window_sums(np.array([market_index]), resource_index)
+
+    def _sum_recent(
+        self, metric: str, resource_index: int, market_indices: np.ndarray
+    ) -> np.ndarray:
+        history = self.history[metric]
+        windows = np.minimum(
+            self.ticks_for_average[market_indices],
+            history.get_retained_lengths((market_indices, resource_index)),
+        )
+        total = np.zeros(len(market_indices), dtype=history.values.dtype)
+        for ticks_back in range(1, int(windows.max(initial=0)) + 1):
+            in_window = windows >= ticks_back
+            total[in_window] += history.get_recent(
+                (market_indices[in_window], resource_index), ticks_back
+            )
+        return total
+
+    def _update_window_sums(self, market_indices: np.ndarray, resource_index: int):
+        # Full recount, only needed when a history or a window is replaced
+        for metric, window_sums in self.window_sums.items():
+            window_sums[market_indices, resource_index] = self._sum_recent(
+                metric, resource_index, market_indices
+            )
+
+    def append_history(
+        self,
+        metric: str,
+        market_indices: np.ndarray,
+        resource_index: int,
+        values: np.ndarray,
+    ):
+        history = self.history[metric]
+        if metric in self.window_sums:
+            # The new value enters the window and the oldest one leaves it,
+            # read before the append could overwrite it
+            window_sums = self.window_sums[metric]
+            windows = self.ticks_for_average[market_indices]
+            leaving = history.lengths[market_indices, resource_index] >= windows
+            window_sums[market_indices[leaving], resource_index] -= history.get_recent(
+                (market_indices[leaving], resource_index), windows[leaving]
+            )
+            window_sums[market_indices, resource_index] += values
+        history.append((market_indices, resource_index), values)
+
+    def add_produced(self, market_index: int, resource_name: ResourceName, amount: int):
+        _check_amount(amount)
+        resource_index = self.get_resource_index(resource_name)
+        self.amounts[market_index, resource_index] += amount
+        self.totals["amounts"][resource_index] += amount
+        self.set_value("produced", market_index, resource_index, amount)
+        self.set_present("has_produced", market_index, resource_index)
+
+    def remove_consumed(
+        self, market_index: int, resource_name: ResourceName, amount: int
+    ):
+        # Ensure we don't consume more than available
+        _check_amount(amount)
+        resource_index = self.get_resource_index(resource_name)
+        available = self.amounts.item(market_index, resource_index)
+        actual_consumption = min(amount, available)
+        self.amounts[market_index, resource_index] = available - actual_consumption
+        self.totals["amounts"][resource_index] -= actual_consumption
+        self.set_value("consumed", market_index, resource_index, actual_consumption)
+        self.set_present("has_consumed", market_index, resource_index)
+
+    def set_value(
+        self, values_name: str, market_index: int, resource_index: int, value
+    ):
+        values = getattr(self, values_name)
+        if values_name not in self.totals:
+            values[market_index, resource_index] = value
+            return
+        _check_amount(value)
+        # The delta is read back from the array, after its dtype cast
+        previous_value = values.item(market_index, resource_index)
+        values[market_index, resource_index] = value
+        self.totals[values_name][resource_index] += (
+            values.item(market_index, resource_index) - previous_value
+        )
+
+    def set_present(
+        self,
+        present_name: str,
+        market_index: int,
+        resource_index: int,
+        is_present: bool = True,
+    ):
+        present = getattr(self, present_name)
+        if present.item(market_index, resource_index) != is_present:
+            present[market_index, resource_index] = is_present
+            self.present_counts[present_name][resource_index] += 1 if is_present else -1
+
+    def add_produced_many(
+        self,
+        market_indices: np.ndarray,
+        resource_indices: np.ndarray,
+        amounts: np.ndarray,
+    ):
+        # add_produced for many (market, resource) pairs, each at most once
+        _check_amounts(amounts)
+        self.amounts[market_indices, resource_indices] += amounts
+        np.add.at(self.totals["amounts"], resource_indices, amounts)
+        self._set_values_many("produced", market_indices, resource_indices, amounts)
+        self.set_present_many("has_produced", market_indices, resource_indices)
+
+    def remove_consumed_many(
+        self,
+        market_indices: np.ndarray,
+        resource_indices: np.ndarray,
+        amounts: np.ndarray,
+    ):
+        # remove_consumed for many (market, resource) pairs, each at most once
+        _check_amounts(amounts)
+        actual_consumption = np.minimum(
+            amounts, self.amounts[market_indices, resource_indices]
+        )
+        self.amounts[market_indices, resource_indices] -= actual_consumption
+        np.subtract.at(self.totals["amounts"], resource_indices, actual_consumption)
+        self._set_values_many(
+            "consumed", market_indices, resource_indices, actual_consumption
+        )
+        self.set_present_many("has_consumed", market_indices, resource_indices)
+
+    def set_present_many(
+        self, present_name: str, market_indices: np.ndarray, resource_indices
+    ):
+        present = getattr(self, present_name)
+        market_indices, resource_indices = np.broadcast_arrays(
+            market_indices, resource_indices
+        )
+        np.add.at(
+            self.present_counts[present_name],
+            resource_indices,
+            ~present[market_indices, resource_indices],
+        )
+        present[market_indices, resource_indices] = True
+
+    def _set_values_many(
+        self,
+        values_name: str,
+        market_indices: np.ndarray,
+        resource_indices: np.ndarray,
+        values: np.ndarray,
+    ):
+        array = getattr(self, values_name)
+        previous_values = array[market_indices, resource_indices]
+        array[market_indices, resource_indices] = values
+        np.add.at(
+            self.totals[values_name],
+            resource_indices,
+            array[market_indices, resource_indices] - previous_values,
+        )
+
+    def set_gold(self, market_index: int, gold: float):
+        previous_gold = self.gold.item(market_index)
+        self.gold[market_index] = gold
+        self.total_gold += self.gold.item(market_index) - previous_gold
+
+    def get_history(
+        self, metric: str, market_index: int, resource_index: int
+    ) -> np.ndarray:
+        return self.history[metric].get((market_index, resource_index))
+
+    def set_history(
+        self, metric: str, market_index: int, resource_index: int, values: list
+    ):
+        self.history[metric].set((market_index, resource_index), values)
+        self._update_window_sums(np.array([market_index]), resource_index)
+
+    def get_totals(self, values_name: str, present_name: str) -> dict:
+        # Sum over all markets of every resource at least one market has
+        values = getattr(self, values_name)[: self.number_of_markets]
+        present = getattr(self, present_name)[: self.number_of_markets]
+        totals = values.sum(axis=0)
+        return {
+            resource_name: totals[resource_index].item()
+            for resource_name, resource_index in self.get_resources()
+            if present[:, resource_index].any()
+        }
+
+    def get_running_totals(self, values_name: str, present_name: str) -> dict:
+        # Same as get_totals from the running sums, O(resources)
+        totals = self.totals[values_name]
+        present_counts = self.present_counts[present_name]
+        return {
+            resource_name: totals[resource_index].item()
+            for resource_name, resource_index in self.get_resources()
+            if present_counts[resource_index]
+        }
+
+    def get_total_gold(self) -> float:
+        return self.gold[: self.number_of_markets].sum().item()
+
+    def _grow_markets(self):
+        self.market_capacity *= 2
+        for name in (
+            *MARKET_RESOURCE_ARRAYS,
+            "gold",
+            "price_change_factor",
+            "ticks_for_average",
+        ):
+            setattr(self, name, _grow_axis(getattr(self, name), 0))
+        for history in self.history.values():
+            history.grow(0, self.market_capacity)
+        for metric in AVERAGED_METRICS:
+            self.window_sums[metric] = _grow_axis(self.window_sums[metric], 0)
+
+    def _grow_resources(self, min_capacity: int):
+        self.resource_capacity = max(2 * self.resource_capacity, min_capacity)
+        for name in MARKET_RESOURCE_ARRAYS:
+            setattr(
+                self, name, _grow_axis(getattr(self, name), 1, self.resource_capacity)
+            )
+        for totals in (self.totals, self.present_counts):
+            for name, values in totals.items():
+                totals[name] = _grow_axis(values, 0, self.resource_capacity)
+        for history in self.history.values():
+            history.grow(1, self.resource_capacity)
+        for metric in AVERAGED_METRICS:
+            self.window_sums[metric] = _grow_axis(
+                self.window_sums[metric], 1, self.resource_capacity
+            )
+
+
+def _check_amount(amount):
+    # Amounts are whole units in integer arrays, which would silently
+    # truncate a fractional amount
+    if not isinstance(amount, (int, np.integer)):
+        raise TypeError(f"Resource amounts must be integers, got {amount!r}")
+
+
+def _check_amounts(amounts: np.ndarray):
+    if np.asarray(amounts).dtype.kind not in "biu":
+        raise TypeError(f"Resource amounts must be integers, got {amounts.dtype}")
+
+
+def _grow_axis(array: np.ndarray, axis: int, size: int | None = None) -> np.ndarray:
+    # Doubles the axis by default
+    padding = [(0, 0)] * array.ndim
+    padding[axis] = (0, array.shape[axis] if size is None else size - array.shape[axis])
+    return np.pad(array, padding)
+
+
+class MarketValues(MutableMapping):
+    # One market row of a (markets x resources) array, behaving like the
+    # defaultdict it replaces, reading a missing resource adds it with 0
+    def __init__(
+        self,
+        market_engine: MarketEngine,
+        values_name: str,
+        present_name: str,
+        market_index: int,
+    ):
+        self.market_engine = market_engine
+        self.values_name = values_name
+        self.present_name = present_name
+        self.market_index = market_index
+
+    def __getitem__(self, resource_name):
+        resource_index = self.market_engine.get_resource_index(resource_name)
+        self.market_engine.set_present(
+            self.present_name, self.market_index, resource_index
+        )
+        return getattr(self.market_engine, self.values_name).item(
+            self.market_index, resource_index
+        )
+
+    def __setitem__(self, resource_name, value):
+        resource_index = self.market_engine.get_resource_index(resource_name)
+        self.market_engine.set_value(
+            self.values_name, self.market_index, resource_index, value
+        )
+        self.market_engine.set_present(
+            self.present_name, self.market_index, resource_index
+        )
+
+    def __delitem__(self, resource_name):
+        resource_index = self.market_engine.get_resource_index(resource_name)
+        present = getattr(self.market_engine, self.present_name)
+        if not present[self.market_index, resource_index]:
+            raise KeyError(resource_name)
+        self.market_engine.set_present(
+            self.present_name, self.market_index, resource_index, False
+        )
+        self.market_engine.set_value(
+            self.values_name, self.market_index, resource_index, 0
+        )
+
+    def __iter__(self):
+        present = getattr(self.market_engine, self.present_name)[self.market_index]
+        return iter(
+            [
+                resource_name
+                for resource_name, resource_index in (
+                    self.market_engine.get_resources()
+                )
+                if present[resource_index]
+            ]
+        )
+
+    def __len__(self):
+        return int(
+            getattr(self.market_engine, self.present_name)[self.market_index].sum()
+        )
+
+
+class MarketResource(Resource):
+    def __init__(
+        self, market_engine: MarketEngine, market_index: int, name: ResourceName
+    ):
+        self.market_engine = market_engine
+        self.market_index = market_index
+        self.resource_index = market_engine.get_resource_index(name)
+        self.name = name
+
+    @property
+    def amount(self) -> int:
+        return self.market_engine.amounts[self.market_index, self.resource_index].item()
+
+    @amount.setter
+    def amount(self, amount: int):
+        self.market_engine.set_value(
+            "amounts", self.market_index, self.resource_index, amount
+        )
+
+
+class MarketResources(Mapping):
+    def __init__(self, market_engine: MarketEngine, market_index: int):
+        self.market_engine = market_engine
+        self.market_index = market_index
+        self._resources: dict[str, MarketResource] = {}
+
+    def __getitem__(self, resource_name):
+        resource_index = self.market_engine.get_resource_index(resource_name)
+        if not self.market_engine.has_amount.item(self.market_index, resource_index):
+            raise KeyError(resource_name)
+        if resource_name not in self._resources:
+            self._resources[resource_name] = MarketResource(
+                self.market_engine, self.market_index, resource_name
+            )
+        return self._resources[resource_name]
+
+    def __iter__(self):
+        has_amount = self.market_engine.has_amount[self.market_index]
+        return iter(
+            [
+                resource_name
+                for resource_name, resource_index in (
+                    self.market_engine.get_resources()
+                )
+                if has_amount[resource_index]
+            ]
+        )
+
+    def __len__(self):
+        return int(self.market_engine.has_amount[self.market_index].sum())
+
+
+class HistorySeries(Sequence):
+    # The kept raw ticks of one column, older ticks are only in the tiers
+    def __init__(
+        self,
+        market_engine: MarketEngine,
+        metric: str,
+        market_index: int,
+        resource_index: int,
+    ):
+        self.market_engine = market_engine
+        self.metric = metric
+        self.market_index = market_index
+        self.resource_index = resource_index
+
+    def _values(self) -> np.ndarray:
+        return self.market_engine.get_history(
+            self.metric, self.market_index, self.resource_index
+        )
+
+    def __getitem__(self, index):
+        values = self._values()[index]
+        return values.tolist() if isinstance(index, slice) else values.item()
+
+    def __len__(self):
+        return int(
+            self.market_engine.history[self.metric].get_retained_lengths(
+                (self.market_index, self.resource_index)
+            )
+        )
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def append(self, value):
+        self.market_engine.append_history(
+            self.metric,
+            np.array([self.market_index]),
+            self.resource_index,
+            np.array([value]),
+        )
+
+    def get_tier(self, level: int) -> np.ndarray:
+        return self.market_engine.history[self.metric].get_tier(
+            level, (self.market_index, self.resource_index)
+        )
+
+
+class MarketHistory(MutableMapping):
+    # History of one metric of one market by resource, assigning a list
+    # replaces the stored history with it
+    def __init__(self, market_engine: MarketEngine, metric: str, market_index: int):
+        self.market_engine = market_engine
+        self.metric = metric
+        self.market_index = market_index
+
+    def __getitem__(self, resource_name) -> HistorySeries:
+        return HistorySeries(
+            self.market_engine,
+            self.metric,
+            self.market_index,
+            self.market_engine.get_resource_index(resource_name),
+        )
+
+    def __setitem__(self, resource_name, values):
+        self.market_engine.set_history(
+            self.metric,
+            self.market_index,
+            self.market_engine.get_resource_index(resource_name),
+            list(values),
+        )
+
+    def __delitem__(self, resource_name):
+        self[resource_name] = []
+
+    def __iter__(self):
+        lengths = self.market_engine.history[self.metric].lengths[self.market_index]
+        return iter(
+            [
+                resource_name
+                for resource_name, resource_index in (
+                    self.market_engine.get_resources()
+                )
+                if lengths[resource_index]
+            ]
+        )
+
+    def __len__(self):
+        return int(
+            np.count_nonzero(
+                self.market_engine.history[self.metric].lengths[self.market_index]
+            )
+        )
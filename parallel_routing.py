@@ -0,0 +1,93 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from path_finding import astar_flat, dijkstra_flat, reconstruct_flat_path
+
+# Shared memory blocks a worker process attached to, by name, with a float
+# view of their cost grid. They stay open for the lifetime of the worker so
+# every chunk reads the same memory without a copy.
+_attached_grids: dict[str, tuple[shared_memory.SharedMemory, memoryview]] = {}
+
+
+def route_tasks(movement_cost, shape, routing, tasks):
+    # Every task is (start_index, target_indices), the flat routers index a
+    # list or a memoryview faster than an array
+    if isinstance(movement_cost, np.ndarray):
+        movement_cost = movement_cost.tolist()
+    connection_paths = []
+    for start_index, target_indices in tasks:
+        if routing == "dijkstra":
+            came_from = dijkstra_flat(movement_cost, shape, start_index, target_indices)
+            connection_paths.extend(
+                reconstruct_flat_path(came_from, start_index, target_index)
+                for target_index in target_indices
+            )
+        else:
+            connection_paths.extend(
+                astar_flat(movement_cost, shape, start_index, target_index)
+                for target_index in target_indices
+            )
+    return connection_paths
+
+
+def route_in_parallel(networks, routing, workers, chunks_per_worker=4):
+    # Every network is (movement_cost, shape, tasks), all networks share one
+    # pool so land and water roads are routed at the same time
+    shared_blocks = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            network_futures = []
+            for movement_cost, shape, tasks in networks:
+                shared_block = _create_shared_grid(movement_cost)
+                shared_blocks.append(shared_block)
+
+                chunk_size = max(
+                    1, math.ceil(len(tasks) / (workers * chunks_per_worker))
+                )
+                network_futures.append(
+                    [
+                        executor.submit(
+                            _route_chunk,
+                            shared_block.name,
+                            shape,
+                            routing,
+                            tasks[chunk_start : chunk_start + chunk_size],
+                        )
+                        for chunk_start in range(0, len(tasks), chunk_size)
+                    ]
+                )
+
+            return [
+                [path for future in futures for path in future.result()]
+                for futures in network_futures
+            ]
+    finally:
+        for shared_block in shared_blocks:
+            shared_block.close()
+            shared_block.unlink()
+
+
+def _create_shared_grid(movement_cost: np.ndarray) -> shared_memory.SharedMemory:
+    movement_cost = np.ascontiguousarray(movement_cost, dtype=np.float64).ravel()
+    shared_block = shared_memory.SharedMemory(create=True, size=movement_cost.nbytes)
+    shared_grid = np.ndarray(
+        movement_cost.shape, dtype=np.float64, buffer=shared_block.buf
+    )
+    shared_grid[:] = movement_cost
+    return shared_block
+
+
+def _attach_shared_grid(name: str, shape: tuple[int, int]) -> memoryview:
+    # Indexing a memoryview gives Python floats as fast as indexing a list
+    if name not in _attached_grids:
+        shared_block = shared_memory.SharedMemory(name=name)
+        shared_grid = shared_block.buf[: shape[0] * shape[1] * 8].cast("d")
+        _attached_grids[name] = (shared_block, shared_grid)
+    return _attached_grids[name][1]
+
+
+def _route_chunk(name, shape, routing, tasks):
+    return route_tasks(_attach_shared_grid(name, shape), shape, routing, tasks)
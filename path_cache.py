@@ -0,0 +1,79 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+# Bump when path finding changes the paths it returns, so stored paths expire
+PATH_CACHE_VERSION = 1
+
+
+class PathCache:
+    def __init__(self, max_entries: int = 4096, cache_dir: str | None = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._paths: OrderedDict[tuple, list[int]] = OrderedDict()
+
+    @staticmethod
+    def fingerprint(grid: np.ndarray) -> str:
+        grid = np.ascontiguousarray(grid)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{PATH_CACHE_VERSION}:{grid.dtype.str}:{grid.shape}".encode())
+        digest.update(grid.data)
+        return digest.hexdigest()
+
+    def get(
+        self, fingerprint: str, start_index: int, goal_index: int, mode: str
+    ) -> list[int] | None:
+        key = (fingerprint, int(start_index), int(goal_index), mode)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            return self._paths[key]
+
+        if self.cache_dir is not None:
+            file_path = self._get_file_path(key)
+            if os.path.exists(file_path):
+                path = np.load(file_path).tolist()
+                self._remember(key, path)
+                self.hits += 1
+                return path
+
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        fingerprint: str,
+        start_index: int,
+        goal_index: int,
+        mode: str,
+        path: list[int] | None,
+    ):
+        if path is None:
+            return
+        key = (fingerprint, int(start_index), int(goal_index), mode)
+        self._remember(key, path)
+
+        if self.cache_dir is not None:
+            file_path = self._get_file_path(key)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # Write then rename, so concurrent runs never read a partial file
+            temporary_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(temporary_path, "wb") as file:
+                np.save(file, np.asarray(path, dtype=np.int64))
+            os.replace(temporary_path, file_path)
+
+    def _remember(self, key: tuple, path: list[int]):
+        self._paths[key] = path
+        self._paths.move_to_end(key)
+        while len(self._paths) > self.max_entries:
+            self._paths.popitem(last=False)
+
+    def _get_file_path(self, key: tuple) -> str:
+        fingerprint, start_index, goal_index, mode = key
+        return os.path.join(
+            self.cache_dir, fingerprint, f"{mode}_{start_index}_{goal_index}.npy"
+        )
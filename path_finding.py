@@ -1,14 +1,147 @@
+import math
 import numpy as np
 import heapq
 from scipy.spatial.distance import cdist
-from scipy.ndimage import binary_dilation
+from scipy.ndimage import binary_dilation, distance_transform_edt
 from scipy.stats import qmc
 from sklearn.preprocessing import MinMaxScaler
 from scipy.ndimage import convolve
 
 
+def movement_cost_grid(grid, speed_based=True):
+    grid_val = np.maximum(np.asarray(grid, dtype=np.float64), 0.000001)
+    cost = (1 / grid_val) if speed_based else grid_val
+    return cost.ravel()
+
+
+def astar_flat(cost, shape, start_index, goal_index):
+    rows, cols = shape
+    goal_row, goal_col = divmod(goal_index, cols)
+    cost = cost.tolist() if isinstance(cost, np.ndarray) else cost
+
+    g_score = np.full(rows * cols, np.inf)
+    came_from = np.full(rows * cols, -1, dtype=np.int64)
+    closed = np.zeros(rows * cols, dtype=bool)
+
+    sqrt = math.sqrt
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    start_row, start_col = divmod(start_index, cols)
+    open_set = [
+        (sqrt((start_row - goal_row) ** 2 + (start_col - goal_col) ** 2), start_index)
+    ]
+    g_score[start_index] = 0
+
+    while open_set:
+        _, current = heappop(open_set)
+
+        if current == goal_index:
+            return reconstruct_flat_path(came_from, start_index, goal_index)
+
+        # Stale heap entry, the node was already expanded with its best score
+        if closed[current]:
+            continue
+        closed[current] = True
+
+        row, col = divmod(current, cols)
+        current_g = g_score[current]
+        for neighbor, neighbor_row, neighbor_col in (
+            (current - cols, row - 1, col),
+            (current + cols, row + 1, col),
+            (current - 1, row, col - 1),
+            (current + 1, row, col + 1),
+        ):
+            if not (0 <= neighbor_row < rows and 0 <= neighbor_col < cols):
+                continue
+            tentative_g_score = current_g + cost[neighbor]
+            if tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                closed[neighbor] = False
+                heappush(
+                    open_set,
+                    (
+                        tentative_g_score
+                        + sqrt(
+                            (neighbor_row - goal_row) ** 2
+                            + (neighbor_col - goal_col) ** 2
+                        ),
+                        neighbor,
+                    ),
+                )
+
+    return None  # No path found
+
+
+def dijkstra_flat(cost, shape, start_index, goal_indices):
+    rows, cols = shape
+    cost = cost.tolist() if isinstance(cost, np.ndarray) else cost
+    remaining_goals = set(int(goal_index) for goal_index in goal_indices)
+    remaining_goals.discard(start_index)
+
+    g_score = np.full(rows * cols, np.inf)
+    came_from = np.full(rows * cols, -1, dtype=np.int64)
+    settled = np.zeros(rows * cols, dtype=bool)
+
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    open_set = [(0.0, start_index)]
+    g_score[start_index] = 0
+
+    while open_set and remaining_goals:
+        current_g, current = heappop(open_set)
+        if settled[current]:
+            continue
+        settled[current] = True
+        remaining_goals.discard(current)
+
+        row, col = divmod(current, cols)
+        for neighbor, neighbor_row, neighbor_col in (
+            (current - cols, row - 1, col),
+            (current + cols, row + 1, col),
+            (current - 1, row, col - 1),
+            (current + 1, row, col + 1),
+        ):
+            if not (0 <= neighbor_row < rows and 0 <= neighbor_col < cols):
+                continue
+            if settled[neighbor]:
+                continue
+            tentative_g_score = current_g + cost[neighbor]
+            if tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                heappush(open_set, (tentative_g_score, neighbor))
+
+    return came_from
+
+
+def reconstruct_flat_path(came_from, start_index, goal_index):
+    if start_index != goal_index and came_from[goal_index] < 0:
+        return None  # Goal was not reached
+
+    path = [goal_index]
+    current = goal_index
+    while current != start_index:
+        current = int(came_from[current])
+        path.append(current)
+    return path[::-1]
+
+
 def astar(grid, start, goal, speed_based=True):
     rows, cols = grid.shape
+    path = astar_flat(
+        movement_cost_grid(grid, speed_based),
+        (rows, cols),
+        int(start[0]) * cols + int(start[1]),
+        int(goal[0]) * cols + int(goal[1]),
+    )
+    if path is None:
+        return None
+    return [divmod(index, cols) for index in path]
+
+
+def astar_reference(grid, start, goal, speed_based=True):
+    rows, cols = grid.shape
 
     def heuristic(a, b):
         return np.linalg.norm(np.array(a) - np.array(b))
@@ -65,6 +198,43 @@ def find_closest_point(arr, point, region2=1):
     return tuple(closest_p2)
 
 
+class NearestPointIndex:
+    def __init__(self, arr, region2=1):
+        self.region_mask = np.asarray(arr) == region2
+        self.has_points = bool(self.region_mask.any())
+        if self.has_points:
+            # Index of a nearest region cell for every cell of the map
+            self.nearest_indices = distance_transform_edt(
+                ~self.region_mask, return_indices=True, return_distances=False
+            )
+
+    def query(self, point):
+        if not self.has_points:
+            return None, None
+        row, col = int(point[0]), int(point[1])
+        nearest_row, nearest_col = self.nearest_indices[:, row, col]
+        squared_distance = (nearest_row - row) ** 2 + (nearest_col - col) ** 2
+
+        # Of all equally close cells return the first in row major order,
+        # same as find_closest_point
+        radius = math.isqrt(squared_distance)
+        rows, cols = self.region_mask.shape
+        for row_shift in range(-radius, radius + 1):
+            candidate_row = row + row_shift
+            if not 0 <= candidate_row < rows:
+                continue
+            col_shift = math.isqrt(squared_distance - row_shift**2)
+            if col_shift**2 != squared_distance - row_shift**2:
+                continue
+            for candidate_col in (col - col_shift, col + col_shift):
+                if (
+                    0 <= candidate_col < cols
+                    and self.region_mask[candidate_row, candidate_col]
+                ):
+                    return candidate_row, candidate_col
+        return int(nearest_row), int(nearest_col)
+
+
 def find_edges(array):
     # Create a binary mask of 1s
     binary_mask = array.astype(bool)
@@ -107,18 +277,90 @@ def select_evenly_spaced_points(edge_indices, num_points):
     return np.array(selected_indices)
 
 
+def poisson_disk_budget(max_size, radius, min_size=0):
+    # Points at least radius apart never outnumber a hexagonal packing
+    side = max_size - min_size + radius
+    return int(math.ceil(2 * side**2 / (math.sqrt(3) * radius**2))) + 1
+
+
 def uniformly_spaced_points(max_size, radius, n_points, seed, min_size=0):
+    # Without n_points the disk is filled until no more points fit
+    saturate = n_points is None
+    if saturate:
+        n_points = poisson_disk_budget(max_size, radius, min_size)
     scaled_radius = radius / max_size
 
     engine = qmc.PoissonDisk(d=2, radius=scaled_radius, seed=seed)
     generated_points = engine.random(n_points)
     scaler = MinMaxScaler(feature_range=(min_size, max_size))
     scaled_points = scaler.fit_transform(generated_points).astype(np.int64)
-    if scaled_points.shape[0] < n_points:
+    if not saturate and scaled_points.shape[0] < n_points:
         print(f"[Warning] Could only generate {scaled_points.shape[0]} points")
     return scaled_points
 
 
+def grid_poisson_disk_points(
+    max_size, radius, seed, min_size=0, candidates_per_cell=30
+):
+    # Dart throwing on a background grid with cells small enough to hold at
+    # most one point. Every round draws one candidate in every empty cell and
+    # tests all of them at once against the 5x5 cells around them, candidates
+    # conflicting with each other are settled by a random priority.
+    rng = np.random.default_rng(seed)
+    extent = max_size - min_size
+    cell_size = radius / math.sqrt(2)
+    cells_per_side = int(math.floor(extent / cell_size)) + 1
+    # Two cells of padding so neighbour lookups never leave the grid
+    side = cells_per_side + 4
+    point_rows = np.full(side * side, np.inf)
+    point_cols = np.full(side * side, np.inf)
+    candidate_rows = np.full(side * side, np.inf)
+    candidate_cols = np.full(side * side, np.inf)
+    priority_grid = np.full(side * side, np.inf)
+    shifts = [row * side + col for row in range(-2, 3) for col in range(-2, 3)]
+
+    grid_rows, grid_cols = np.indices((cells_per_side, cells_per_side))
+    empty_cells = ((grid_rows + 2) * side + grid_cols + 2).ravel()
+    for _ in range(candidates_per_cell):
+        if empty_cells.size == 0:
+            break
+        cell_rows, cell_cols = np.divmod(empty_cells, side)
+        rows = np.minimum(
+            (cell_rows - 2 + rng.random(len(empty_cells))) * cell_size, extent
+        )
+        cols = np.minimum(
+            (cell_cols - 2 + rng.random(len(empty_cells))) * cell_size, extent
+        )
+        priorities = rng.random(len(empty_cells))
+        candidate_rows[empty_cells] = rows
+        candidate_cols[empty_cells] = cols
+        priority_grid[empty_cells] = priorities
+
+        accepted = np.ones(len(empty_cells), dtype=bool)
+        for shift in shifts:
+            neighbours = empty_cells + shift
+            too_close_to_point = (point_rows[neighbours] - rows) ** 2 + (
+                point_cols[neighbours] - cols
+            ) ** 2 < radius**2
+            loses_to_candidate = (
+                (candidate_rows[neighbours] - rows) ** 2
+                + (candidate_cols[neighbours] - cols) ** 2
+                < radius**2
+            ) & (priority_grid[neighbours] < priorities)
+            accepted &= ~(too_close_to_point | loses_to_candidate)
+
+        point_rows[empty_cells[accepted]] = rows[accepted]
+        point_cols[empty_cells[accepted]] = cols[accepted]
+        candidate_rows[empty_cells] = np.inf
+        candidate_cols[empty_cells] = np.inf
+        priority_grid[empty_cells] = np.inf
+        empty_cells = empty_cells[~accepted]
+
+    has_point = np.isfinite(point_rows)
+    points = np.column_stack([point_rows[has_point], point_cols[has_point]])
+    return points.astype(np.int64) + min_size
+
+
 def sum_neighbours(array, neighbour_range=1):
     # Define the convolution kernel
     size = 2 * neighbour_range + 1  # Kernel size based on the neighbour range
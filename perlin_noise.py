@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 
@@ -106,6 +108,244 @@ def generate_fractal_noise_2d(
     return scaled_noise
 
 
+def add_perlin_noise_2d(
+    noise,
+    res,
+    amplitude=1,
+    tileable=(False, False),
+    interpolant=interpolant,
+    gradient_angles=None,
+    band_rows=256,
+    rows=None,
+):
+    # Adds amplitude times perlin noise to noise in place. Works on bands of
+    # rows in the dtype of noise, so no full size float64 temporaries are
+    # made. Draws the gradients like generate_perlin_noise_2d does. With rows
+    # (start, stop) only those rows are filled in.
+    shape = noise.shape
+    first_row, last_row = rows if rows is not None else (0, shape[0])
+    dtype = noise.dtype
+    d = (shape[0] // res[0], shape[1] // res[1])
+    if gradient_angles is None:
+        gradient_angles = 2 * np.pi * np.random.rand(res[0] + 1, res[1] + 1)
+    row_gradients = np.cos(gradient_angles).astype(dtype)
+    col_gradients = np.sin(gradient_angles).astype(dtype)
+    if tileable[0]:
+        row_gradients[-1, :] = row_gradients[0, :]
+        col_gradients[-1, :] = col_gradients[0, :]
+    if tileable[1]:
+        row_gradients[:, -1] = row_gradients[:, 0]
+        col_gradients[:, -1] = col_gradients[:, 0]
+
+    # Position inside the lattice cell only depends on the row or the column
+    lattice_rows, row_offsets = np.divmod(np.arange(shape[0]), d[0])
+    lattice_cols, col_offsets = np.divmod(np.arange(shape[1]), d[1])
+    row_offsets = (row_offsets / d[0]).astype(dtype)
+    col_offsets = (col_offsets / d[1]).astype(dtype)
+    row_t = interpolant(row_offsets)
+    col_t = interpolant(col_offsets)
+    scale = dtype.type(np.sqrt(2) * amplitude)
+
+    for band_start in range(first_row, last_row, band_rows):
+        band = slice(band_start, min(band_start + band_rows, last_row))
+        band_lattice_rows = lattice_rows[band]
+        band_row_offsets = row_offsets[band, None]
+        temporary = np.empty((len(band_lattice_rows), shape[1]), dtype)
+
+        def ramp(row_shift, col_shift):
+            cells = np.ix_(band_lattice_rows + row_shift, lattice_cols + col_shift)
+            result = row_gradients[cells]
+            result *= band_row_offsets - row_shift
+            np.multiply(col_gradients[cells], col_offsets - col_shift, out=temporary)
+            result += temporary
+            return result
+
+        # Interpolation, n0 ends up in n00 and n1 in n01
+        n00, n10 = ramp(0, 0), ramp(1, 0)
+        n10 -= n00
+        n10 *= row_t[band, None]
+        n00 += n10
+        del n10
+        n01, n11 = ramp(0, 1), ramp(1, 1)
+        n11 -= n01
+        n11 *= row_t[band, None]
+        n01 += n11
+        del n11
+        n01 -= n00
+        n01 *= col_t
+        n00 += n01
+        n00 *= scale
+        noise[band] += n00
+
+
+def generate_fractal_noise_2d_compact(
+    shape,
+    res,
+    octaves=1,
+    persistence=0.5,
+    lacunarity=2,
+    tileable=(False, False),
+    interpolant=interpolant,
+    dtype=np.float32,
+    band_rows=256,
+    seed=None,
+    workers=1,
+):
+    # Same noise as generate_fractal_noise_2d, up to the precision of dtype,
+    # with one full size array instead of tens of float64 temporaries.
+    # Without a seed the gradients come from np.random like in
+    # generate_fractal_noise_2d. With a seed every octave draws from its own
+    # stream spawned from it, so the noise does not depend on draw order.
+    noise = np.zeros(shape, dtype=dtype)
+    if seed is not None:
+        octave_generators = [
+            np.random.default_rng(octave_seed)
+            for octave_seed in np.random.SeedSequence(seed).spawn(octaves)
+        ]
+
+    octave_parameters = []
+    frequency = 1
+    amplitude = 1
+    for octave in range(octaves):
+        octave_res = (frequency * res[0], frequency * res[1])
+        lattice_shape = (octave_res[0] + 1, octave_res[1] + 1)
+        if seed is None:
+            random_values = np.random.rand(*lattice_shape)
+        else:
+            random_values = octave_generators[octave].random(lattice_shape)
+        octave_parameters.append((octave_res, amplitude, 2 * np.pi * random_values))
+        frequency *= lacunarity
+        amplitude *= persistence
+
+    def fill_rows(rows):
+        for octave_res, octave_amplitude, gradient_angles in octave_parameters:
+            add_perlin_noise_2d(
+                noise,
+                octave_res,
+                octave_amplitude,
+                tileable,
+                interpolant,
+                gradient_angles,
+                band_rows,
+                rows,
+            )
+
+    if workers == 1:
+        fill_rows((0, shape[0]))
+    else:
+        # Threads fill disjoint bands of rows with every octave, NumPy
+        # releases the GIL so the bands run in parallel. Every cell sums its
+        # octaves in the same order, so the result does not depend on workers.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(
+                executor.map(
+                    fill_rows,
+                    [
+                        (band_start, min(band_start + band_rows, shape[0]))
+                        for band_start in range(0, shape[0], band_rows)
+                    ],
+                )
+            )
+
+    scale_columns(noise, -1, 1)
+    return noise
+
+
+def scale_columns(noise, minimum, maximum):
+    # In place version of MinMaxScaler.fit_transform, every column is scaled
+    # on its own
+    column_minimum = noise.min(axis=0)
+    column_range = noise.max(axis=0) - column_minimum
+    column_range[column_range == 0] = 1
+    noise -= column_minimum
+    noise *= (maximum - minimum) / column_range
+    noise += minimum
+
+
+# Large odd constants for hashing lattice coordinates
+_SEED_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_OCTAVE_MULTIPLIER = np.uint64(0xD1B54A32D192ED03)
+_ROW_MULTIPLIER = np.uint64(0xABC98388FB8FAC03)
+_COL_MULTIPLIER = np.uint64(0x8CB92BA72F3D8DD7)
+
+
+def lattice_gradients(seed, octave, lattice_rows, lattice_cols):
+    # The gradient of a lattice point only depends on the seed, the octave
+    # and the point coordinates, so any part of the world can be generated
+    # on its own and always matches its neighbours
+    lattice_rows = np.asarray(lattice_rows, dtype=np.int64).view(np.uint64)
+    lattice_cols = np.asarray(lattice_cols, dtype=np.int64).view(np.uint64)
+    with np.errstate(over="ignore"):
+        hashed = (
+            np.uint64(seed) * _SEED_MULTIPLIER
+            + np.uint64(octave) * _OCTAVE_MULTIPLIER
+            + lattice_rows * _ROW_MULTIPLIER
+            + lattice_cols * _COL_MULTIPLIER
+        )
+        # splitmix64 finalizer
+        hashed = (hashed ^ (hashed >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        hashed = (hashed ^ (hashed >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        hashed ^= hashed >> np.uint64(31)
+    angles = 2 * np.pi * (hashed >> np.uint64(11)) * 2.0**-53
+    return np.cos(angles), np.sin(angles)
+
+
+def coordinate_perlin_noise_2d(
+    rows, cols, period, seed, octave=0, interpolant=interpolant
+):
+    # Perlin noise at world coordinates rows, cols (broadcast together) with
+    # lattice points every period cells
+    rows = np.asarray(rows) / period
+    cols = np.asarray(cols) / period
+    lattice_rows = np.floor(rows).astype(np.int64)
+    lattice_cols = np.floor(cols).astype(np.int64)
+    row_offsets = rows - lattice_rows
+    col_offsets = cols - lattice_cols
+
+    def ramp(row_shift, col_shift):
+        gradient_rows, gradient_cols = lattice_gradients(
+            seed, octave, lattice_rows + row_shift, lattice_cols + col_shift
+        )
+        return (row_offsets - row_shift) * gradient_rows + (
+            col_offsets - col_shift
+        ) * gradient_cols
+
+    row_t = interpolant(row_offsets)
+    col_t = interpolant(col_offsets)
+    n0 = ramp(0, 0) * (1 - row_t) + row_t * ramp(1, 0)
+    n1 = ramp(0, 1) * (1 - row_t) + row_t * ramp(1, 1)
+    return np.sqrt(2) * ((1 - col_t) * n0 + col_t * n1)
+
+
+def generate_fractal_noise_chunk(
+    origin,
+    shape,
+    period,
+    octaves=1,
+    persistence=0.5,
+    lacunarity=2,
+    seed=0,
+    interpolant=interpolant,
+):
+    # Fractal noise for the world cells origin to origin + shape. Any chunk
+    # of the world can be generated alone and chunks line up seamlessly.
+    # Noise is scaled by the total amplitude instead of the min and max of
+    # the whole map, which a chunk can not know.
+    rows = np.arange(origin[0], origin[0] + shape[0])[:, None]
+    cols = np.arange(origin[1], origin[1] + shape[1])[None, :]
+    noise = np.zeros(shape)
+    amplitude = 1
+    total_amplitude = 0
+    for octave in range(octaves):
+        noise += amplitude * coordinate_perlin_noise_2d(
+            rows, cols, period, seed, octave, interpolant
+        )
+        total_amplitude += amplitude
+        period /= lacunarity
+        amplitude *= persistence
+    return np.clip(noise / total_amplitude, -1, 1)
+
+
 # Example usage:
 if __name__ == "__main__":
     np.random.seed(42)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 import random
-from resources import ResourceName
+import numpy as np
+from resources import ResourceName, ResourceValues
 
 
 class ProductionBuilding(ABC):
@@ -61,9 +62,13 @@ class ProductionBuilding(ABC):
     def required_resources_for_one_production_cycle(self):
         pass
 
+    @property
+    def base_production_range(self) -> tuple[int, int]:
+        return 1, 2
+
     @property
     def base_production(self):
-        return random.randint(1, 2)
+        return random.randint(*self.base_production_range)
 
 
 class Farm(ProductionBuilding):
@@ -71,7 +76,9 @@ class Farm(ProductionBuilding):
     def __init__(self) -> None:
         self._produced_resource = ResourceName.Wheat
         self._level = 1
-        self._required_resources_for_one_production_cycle = {}
+        self._required_resources_for_one_production_cycle = ResourceValues(
+            dtype=np.int64
+        )
 
     @property
     def produced_resource(self):
@@ -86,8 +93,8 @@ class Farm(ProductionBuilding):
         return self._required_resources_for_one_production_cycle
 
     @property
-    def base_production(self):
-        return random.randint(3, 7)
+    def base_production_range(self) -> tuple[int, int]:
+        return 3, 7
 
 
 class IronMine(ProductionBuilding):
@@ -95,7 +102,9 @@ class IronMine(ProductionBuilding):
     def __init__(self) -> None:
         self._produced_resource = ResourceName.Iron
         self._level = 1
-        self._required_resources_for_one_production_cycle = {ResourceName.Wheat: 1}
+        self._required_resources_for_one_production_cycle = ResourceValues(
+            {ResourceName.Wheat: 1}, dtype=np.int64
+        )
 
     @property
     def produced_resource(self):
@@ -115,7 +124,9 @@ class WoodCutterCottage(ProductionBuilding):
     def __init__(self) -> None:
         self._produced_resource = ResourceName.Wood
         self._level = 1
-        self._required_resources_for_one_production_cycle = {ResourceName.Wheat: 1}
+        self._required_resources_for_one_production_cycle = ResourceValues(
+            {ResourceName.Wheat: 1}, dtype=np.int64
+        )
 
     @property
     def produced_resource(self):
@@ -135,7 +146,9 @@ class StoneMine(ProductionBuilding):
     def __init__(self) -> None:
         self._produced_resource = ResourceName.Stone
         self._level = 1
-        self._required_resources_for_one_production_cycle = {ResourceName.Wheat: 1}
+        self._required_resources_for_one_production_cycle = ResourceValues(
+            {ResourceName.Wheat: 1}, dtype=np.int64
+        )
 
     @property
     def produced_resource(self):
@@ -155,10 +168,9 @@ class ToolsSmithy(ProductionBuilding):
     def __init__(self) -> None:
         self._produced_resource = ResourceName.Tools
         self._level = 1
-        self._required_resources_for_one_production_cycle = {
-            ResourceName.Iron: 2,
-            ResourceName.Wheat: 1,
-        }
+        self._required_resources_for_one_production_cycle = ResourceValues(
+            {ResourceName.Iron: 2, ResourceName.Wheat: 1}, dtype=np.int64
+        )
 
     @property
     def produced_resource(self):
@@ -0,0 +1,132 @@
+import numpy as np
+from city import City
+from global_market import GlobalMarket
+
+
+class ProductionEngine:
+    def __init__(self, global_market: GlobalMarket, seed=None):
+        # Every production building of every city is a row of the recipe
+        # arrays. Rows with the same position in their city's building list
+        # are evaluated together, so earlier buildings of a city still get
+        # the inputs first like in City.produce_resources.
+        # The recipes are read once, after a city's production_buildings or
+        # a building's level change invalidate_recipes has to be called.
+        self.global_market = global_market
+        self.market_engine = global_market.market_engine
+        self.random_generator = np.random.default_rng(seed)
+        self.cities: list[City] = []
+        self.slot_rows: list[np.ndarray] | None = None
+
+    def add_city(self, city: City):
+        self.cities.append(city)
+        self.invalidate_recipes()
+
+    def invalidate_recipes(self):
+        self.slot_rows = None
+
+    def produce(self):
+        if (
+            self.slot_rows is None
+            or self.inputs.shape[1] != self.market_engine.resource_capacity
+        ):
+            self._build_recipes()
+        market_engine = self.market_engine
+        output_values = self._get_output_values()
+
+        for rows in self.slot_rows:
+            market_indices = self.market_indices[rows]
+            inputs = self.inputs[rows]
+            can_produce = np.all(
+                market_engine.amounts[market_indices] >= inputs, axis=1
+            )
+            input_costs = (market_engine.prices[market_indices] * inputs).sum(axis=1)
+            # The local prices of the inputs are read for buildings that can
+            # produce, which adds them to the markets' current prices
+            input_rows, input_resources = np.nonzero(inputs[can_produce])
+            market_engine.set_present_many(
+                "has_price", market_indices[can_produce][input_rows], input_resources
+            )
+
+            producing = can_produce & (output_values[rows] > input_costs)
+            rows, market_indices = rows[producing], market_indices[producing]
+            base_production = self.random_generator.integers(
+                self.production_low[rows], self.production_high[rows], endpoint=True
+            )
+            market_engine.add_produced_many(
+                market_indices,
+                self.produced_resources[rows],
+                np.trunc(base_production * self.levels[rows]).astype(np.int64),
+            )
+            input_rows, input_resources = np.nonzero(self.inputs[rows])
+            market_engine.remove_consumed_many(
+                market_indices[input_rows],
+                input_resources,
+                self.inputs[rows][input_rows, input_resources],
+            )
+
+    def _get_output_values(self) -> np.ndarray:
+        # Estimated value of one production cycle of every building, the
+        # estimates only change once per tick
+        estimated_prices = np.zeros(self.market_engine.resource_capacity)
+        for resource_index in np.unique(self.produced_resources):
+            estimated_prices[resource_index] = (
+                self.global_market.estimate_base_resource_price(
+                    self.market_engine.registry.get_name(resource_index)
+                )
+            )
+        return estimated_prices[self.produced_resources] * self.value_multipliers
+
+    def _build_recipes(self):
+        buildings = [
+            (city.local_market.market_index, slot, production_building)
+            for city in self.cities
+            for slot, production_building in enumerate(city.production_buildings)
+        ]
+        self.produced_resources = np.array(
+            [
+                self.market_engine.get_resource_index(
+                    production_building.produced_resource
+                )
+                for _, _, production_building in buildings
+            ],
+            dtype=np.int64,
+        )
+        required_resources = [
+            [
+                (self.market_engine.get_resource_index(resource_name), amount)
+                for resource_name, amount in (
+                    production_building.required_resources_for_one_production_cycle.items()
+                )
+            ]
+            for _, _, production_building in buildings
+        ]
+        # Resources first used by a recipe may have grown the market arrays
+        self.inputs = np.zeros(
+            (len(buildings), self.market_engine.resource_capacity), dtype=np.int64
+        )
+        for row, recipe in enumerate(required_resources):
+            for resource_index, amount in recipe:
+                self.inputs[row, resource_index] = amount
+
+        self.market_indices = np.array(
+            [market_index for market_index, _, _ in buildings], dtype=np.int64
+        )
+        self.levels = np.array(
+            [production_building.level for _, _, production_building in buildings],
+            dtype=float,
+        )
+        self.value_multipliers = np.trunc(2 * self.levels)
+        production_ranges = np.array(
+            [
+                production_building.base_production_range
+                for _, _, production_building in buildings
+            ],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        self.production_low = production_ranges[:, 0]
+        self.production_high = production_ranges[:, 1]
+
+        slots = np.array([slot for _, slot, _ in buildings], dtype=np.int64)
+        self.slot_rows = [
+            np.flatnonzero(slots == slot) for slot in range(slots.max(initial=-1) + 1)
+        ]
@@ -0,0 +1,65 @@
+import numpy as np
+from scipy.ndimage import find_objects, minimum_filter
+
+
+class RegionIndex:
+    def __init__(
+        self, labeled_array: np.ndarray, num_regions: int, first_region_id: int = 1
+    ):
+        # One label array for all regions instead of a full size mask per
+        # region, local label l is region first_region_id + l - 1
+        self.labeled_array = labeled_array
+        self.num_regions = num_regions
+        self.first_region_id = first_region_id
+        self.sizes = np.bincount(labeled_array.ravel(), minlength=num_regions + 1)[1:]
+        self.bounding_boxes = find_objects(labeled_array, max_label=num_regions)
+        self._nearby_labels: dict[int, np.ndarray] = {}
+
+    @property
+    def region_ids(self) -> range:
+        return range(self.first_region_id, self.first_region_id + self.num_regions)
+
+    def get_size(self, region_id: int) -> int:
+        return int(self.sizes[region_id - self.first_region_id])
+
+    def get_bounding_box(self, region_id: int) -> tuple[slice, slice]:
+        return self.bounding_boxes[region_id - self.first_region_id]
+
+    def get_mask(self, region_id: int) -> np.ndarray:
+        return self.labeled_array == region_id - self.first_region_id + 1
+
+    def get_region_ids(
+        self, positions: np.ndarray, max_distance: int | None = None
+    ) -> np.ndarray:
+        # Region id of every position, 0 for positions outside all regions
+        # or outside the map. With max_distance it is the lowest region id
+        # within that euclidean distance of the position instead.
+        positions = np.asarray(positions).astype(int).reshape(-1, 2)
+        region_ids = np.zeros(len(positions), dtype=int)
+        inside_map = np.all(
+            (positions >= 0) & (positions < self.labeled_array.shape), axis=1
+        )
+        if max_distance is None:
+            labeled_array = self.labeled_array
+        else:
+            labeled_array = self.get_nearby_labels(max_distance)
+        labels = labeled_array[tuple(positions[inside_map].T)]
+        region_ids[inside_map] = np.where(
+            labels > 0, labels + self.first_region_id - 1, 0
+        )
+        return region_ids
+
+    def get_nearby_labels(self, max_distance: int) -> np.ndarray:
+        # Lowest local label within max_distance of every cell, computed for
+        # the whole map once so any number of positions is a single gather
+        if max_distance not in self._nearby_labels:
+            offsets = np.arange(-max_distance, max_distance + 1)
+            disk = offsets[:, None] ** 2 + offsets[None, :] ** 2 <= max_distance**2
+            no_region = self.num_regions + 1
+            labels = np.where(self.labeled_array > 0, self.labeled_array, no_region)
+            nearby_labels = minimum_filter(
+                labels, footprint=disk, mode="constant", cval=no_region
+            )
+            nearby_labels[nearby_labels == no_region] = 0
+            self._nearby_labels[max_distance] = nearby_labels
+        return self._nearby_labels[max_distance]
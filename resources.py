@@ -1,6 +1,9 @@
+from collections.abc import Mapping, MutableMapping
 from enum import Enum
 import random  # For simulating real-time data updates
 
+import numpy as np
+
 
 class ResourceName(str, Enum):
     Iron = "Iron"
@@ -17,3 +20,113 @@ class Resource:
 
     def __str__(self):
         return f"{self.name}: {self.amount}"
+
+
+class ResourceRegistry:
+    def __init__(self, resource_names=()):
+        # Dense integer id of every resource in registration order, so per
+        # resource data can live in arrays indexed by it
+        self.resource_names: list[str] = []
+        self.resource_ids: dict[str, int] = {}
+        self.register_all(resource_names)
+
+    def register(self, resource_name: str) -> int:
+        # Registering a known resource again returns its id
+        if resource_name not in self.resource_ids:
+            self.resource_ids[resource_name] = len(self.resource_names)
+            self.resource_names.append(resource_name)
+        return self.resource_ids[resource_name]
+
+    def register_all(self, resource_names) -> list[int]:
+        return [self.register(resource_name) for resource_name in resource_names]
+
+    def get_id(self, resource_name: str) -> int:
+        return self.resource_ids[resource_name]
+
+    def get_name(self, resource_id: int) -> str:
+        return self.resource_names[resource_id]
+
+    def __len__(self):
+        return len(self.resource_names)
+
+    def __iter__(self):
+        return iter(self.resource_names)
+
+    def __contains__(self, resource_name):
+        return resource_name in self.resource_ids
+
+
+resource_registry = ResourceRegistry(ResourceName)
+
+
+class ResourceValues(MutableMapping):
+    # Per resource values in an array indexed by resource id, used like the
+    # dict it replaces. Resources registered later grow the array on write.
+    def __init__(
+        self,
+        values: Mapping | None = None,
+        dtype=float,
+        registry: ResourceRegistry = resource_registry,
+    ):
+        self.registry = registry
+        self.values = np.zeros(len(registry), dtype=dtype)
+        self.present = np.zeros(len(registry), dtype=bool)
+        # (name, value) of the present resources by id, rebuilt after a change
+        self._items: tuple[tuple[str, object], ...] | None = None
+        # Counts the writes, so caches of derived values can tell they changed
+        self.version = 0
+        if values is not None:
+            self.update(values)
+
+    def __getitem__(self, resource_name):
+        resource_id = self.registry.resource_ids[resource_name]
+        if resource_id >= len(self.present) or not self.present.item(resource_id):
+            raise KeyError(resource_name)
+        return self.values.item(resource_id)
+
+    def __setitem__(self, resource_name, value):
+        resource_id = self.registry.get_id(resource_name)
+        if resource_id >= len(self.present):
+            self._grow()
+        self.values[resource_id] = value
+        self.present[resource_id] = True
+        self._items = None
+        self.version += 1
+
+    def __delitem__(self, resource_name):
+        resource_id = self.registry.get_id(resource_name)
+        if resource_id >= len(self.present) or not self.present.item(resource_id):
+            raise KeyError(resource_name)
+        self.values[resource_id] = 0
+        self.present[resource_id] = False
+        self._items = None
+        self.version += 1
+
+    def __iter__(self):
+        return iter([resource_name for resource_name, _ in self.items()])
+
+    def __len__(self):
+        return len(self.items())
+
+    def items(self):
+        # Recipes iterate their items on every production, so they are cached
+        if self._items is None:
+            self._items = tuple(
+                (self.registry.get_name(resource_id), self.values.item(resource_id))
+                for resource_id in np.flatnonzero(self.present)
+            )
+        return self._items
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)})"
+
+    def get_array(self) -> np.ndarray:
+        # Values of all registered resources by id, 0 for missing ones
+        if len(self.values) < len(self.registry):
+            self._grow()
+        return self.values
+
+    def _grow(self):
+        padding = (0, len(self.registry) - len(self.values))
+        self.values = np.pad(self.values, padding)
+        self.present = np.pad(self.present, padding)
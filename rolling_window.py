@@ -0,0 +1,31 @@
+import numpy as np
+from history_store import BoundedHistory
+
+
+class RollingHistory(BoundedHistory):
+    # History that also keeps the sum of its last window entries, so the
+    # recent average costs O(1) whatever the window is. It holds consumed and
+    # produced amounts, so it stores integers unless told otherwise.
+    def __init__(self, window: int, values=(), dtype=np.int64, **history_options):
+        super().__init__(values, dtype, **history_options)
+        self.set_window(window)
+
+    def append(self, value):
+        if len(self) >= self.window:
+            self.window_sum -= self.store.get_recent((0,), self.window).item()
+        super().append(value)
+        self.window_sum += value
+
+    def set_window(self, window: int):
+        if window > self.store.capacity:
+            raise ValueError(
+                f"Can't average {window} ticks, only {self.store.capacity} "
+                "ticks of history are kept"
+            )
+        self.window = window
+        self.window_sum = sum(self[-window:])
+
+    def get_recent_average(self, window: int) -> float:
+        if window != self.window:
+            self.set_window(window)
+        return self.window_sum / window
@@ -0,0 +1,90 @@
+import threading
+import time
+
+
+class FixedTimestepScheduler:
+    def __init__(
+        self,
+        step,
+        tick_rate: float = 60.0,
+        max_steps_per_frame: int = 5,
+        clock=time.perf_counter,
+    ):
+        self.step = step
+        self.tick_interval = 1 / tick_rate
+        # Caps the catch up after a slow frame, the rest of the backlog is
+        # dropped so the simulation never spirals behind
+        self.max_steps_per_frame = max_steps_per_frame
+        self.clock = clock
+        self.accumulated_time = 0.0
+        self.last_time = None
+        self.dropped_ticks = 0
+
+    def advance(self) -> int:
+        # Runs every tick that became due since the last call
+        now = self.clock()
+        if self.last_time is None:
+            self.last_time = now
+        self.accumulated_time += now - self.last_time
+        self.last_time = now
+
+        steps = 0
+        while (
+            self.accumulated_time >= self.tick_interval
+            and steps < self.max_steps_per_frame
+        ):
+            self.step()
+            self.accumulated_time -= self.tick_interval
+            steps += 1
+
+        if self.accumulated_time >= self.tick_interval:
+            backlog = int(self.accumulated_time // self.tick_interval)
+            self.dropped_ticks += backlog
+            self.accumulated_time -= backlog * self.tick_interval
+        return steps
+
+    def time_until_next_tick(self) -> float:
+        return max(0.0, self.tick_interval - self.accumulated_time)
+
+
+class SnapshotBuffer:
+    def __init__(self):
+        # The writer fills the back buffer and swaps it to the front, readers
+        # only ever see a complete snapshot
+        self._buffers = [None, None]
+        self._front = 0
+        self._lock = threading.Lock()
+
+    def publish(self, snapshot):
+        back = 1 - self._front
+        self._buffers[back] = snapshot
+        with self._lock:
+            self._front = back
+
+    def read(self):
+        with self._lock:
+            return self._buffers[self._front]
+
+
+class SimulationThread(threading.Thread):
+    def __init__(
+        self,
+        scheduler: FixedTimestepScheduler,
+        make_snapshot,
+        snapshots: SnapshotBuffer,
+    ):
+        super().__init__(daemon=True)
+        self.scheduler = scheduler
+        self.make_snapshot = make_snapshot
+        self.snapshots = snapshots
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self.scheduler.advance():
+                self.snapshots.publish(self.make_snapshot())
+            self._stop_event.wait(self.scheduler.time_until_next_tick())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
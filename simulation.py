@@ -0,0 +1,147 @@
+import argparse
+import time
+
+import numpy as np
+from city_connector import CityConnector
+from city_factory import CityFactory
+from global_market import GlobalMarket
+from map import GameMap
+from map_pipeline import MapPipeline
+from path_cache import PathCache
+from production_engine import ProductionEngine
+
+SIMULATION_PHASES = ("update_prices", "consume_resources", "produce_resources")
+
+
+class SimulationSnapshot:
+    def __init__(
+        self,
+        tick: int,
+        prices: dict,
+        city_prices: dict[str, dict],
+    ):
+        # Copies, so a renderer can read them while the simulation goes on
+        self.tick = tick
+        self.prices = prices
+        self.city_prices = city_prices
+
+
+class Simulation:
+    def __init__(
+        self,
+        seed=2137,
+        path_cache: PathCache | None = None,
+        map_pipeline: MapPipeline | None = None,
+        vectorized_production: bool = False,
+    ):
+        self.seed = seed
+        np.random.seed(self.seed)
+        self.npcs = []
+        self.global_market = GlobalMarket({}, self.npcs)
+        self.city_factory = CityFactory(self.global_market)
+        self.path_cache = path_cache
+        self.city_connector = CityConnector(path_cache=self.path_cache)
+        self.game_map = GameMap(
+            self.city_factory,
+            self.city_connector,
+            self.seed,
+            self.path_cache,
+            map_pipeline,
+        )
+        self.global_market.cities = self.game_map.cities
+        # All buildings of all cities produce in a few array operations. The
+        # amounts come from their own generator instead of the random module,
+        # so a seed gives a different economy than the default city by city
+        # production.
+        self.production_engine = None
+        if vectorized_production:
+            self.production_engine = ProductionEngine(self.global_market, self.seed)
+            for city in self.game_map.cities.values():
+                self.production_engine.add_city(city)
+        self.ticks = 0
+        # Seconds spent in every phase over all ticks
+        self.phase_times = {phase: 0.0 for phase in SIMULATION_PHASES}
+
+    def tick(self):
+        start_time = time.perf_counter()
+        self.global_market.update_prices()
+        phase_end = time.perf_counter()
+        self.phase_times["update_prices"] += phase_end - start_time
+
+        if self.production_engine is None:
+            self._consume_and_produce_city_by_city(phase_end)
+        else:
+            for city in self.game_map.cities.values():
+                city.consume_resources()
+            consume_end = time.perf_counter()
+            self.production_engine.produce()
+            self.phase_times["consume_resources"] += consume_end - phase_end
+            self.phase_times["produce_resources"] += time.perf_counter() - consume_end
+        self.ticks += 1
+
+    def _consume_and_produce_city_by_city(self, phase_end: float):
+        # Process city resource consumption and production, city by city so
+        # the random draws stay in the same order
+        consume_time = 0.0
+        for city in self.game_map.cities.values():
+            phase_start = phase_end
+            city.consume_resources()
+            consume_end = time.perf_counter()
+            city.produce_resources()
+            phase_end = time.perf_counter()
+            consume_time += consume_end - phase_start
+            self.phase_times["produce_resources"] += phase_end - consume_end
+        self.phase_times["consume_resources"] += consume_time
+
+    def make_snapshot(self) -> SimulationSnapshot:
+        return SimulationSnapshot(
+            self.ticks,
+            dict(self.global_market.current_price),
+            {
+                city.name: dict(city.local_market.current_price)
+                for city in self.game_map.cities.values()
+            },
+        )
+
+    def run(self, ticks: int) -> dict:
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            self.tick()
+        elapsed = time.perf_counter() - start_time
+        return {
+            "ticks": ticks,
+            "seconds": elapsed,
+            "ticks_per_second": ticks / elapsed if elapsed else float("inf"),
+            "phase_seconds": dict(self.phase_times),
+        }
+
+
+def print_report(report: dict):
+    print(
+        f"{report['ticks']} ticks in {report['seconds']:.2f}s "
+        f"({report['ticks_per_second']:.1f} ticks/s)"
+    )
+    total_phase_seconds = sum(report["phase_seconds"].values()) or 1
+    for phase, seconds in report["phase_seconds"].items():
+        print(
+            f"  {phase}: {seconds:.3f}s "
+            f"({seconds / report['ticks'] * 1000:.3f}ms/tick, "
+            f"{seconds / total_phase_seconds:.0%})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the economy without a window")
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=2137)
+    parser.add_argument(
+        "--vectorized-production",
+        action="store_true",
+        help="produce with the production engine instead of building by building",
+    )
+    arguments = parser.parse_args()
+
+    simulation = Simulation(
+        arguments.seed, vectorized_production=arguments.vectorized_production
+    )
+    print_report(simulation.run(arguments.ticks))
@@ -1,6 +1,27 @@
 import numpy as np
 import time
-from path_finding import astar
+from path_finding import astar, astar_reference
+
+
+def time_pathfinder(pathfinder, grid, start, goal, runs=3):
+    total_time = 0
+    path = None
+    for run in range(runs):
+        start_time = time.perf_counter()
+        path = pathfinder(grid, start, goal, speed_based=True)
+        end_time = time.perf_counter()
+
+        elapsed = end_time - start_time
+        total_time += elapsed
+
+        if path is not None:
+            print(f"  Run {run + 1}: {elapsed*1000:.2f}ms")
+        else:
+            print(f"  Run {run + 1}: {elapsed*1000:.2f}ms (No path)")
+
+    avg_time = total_time / runs
+    print(f"  Average: {avg_time*1000:.2f}ms")
+    return avg_time, path
 
 
 def benchmark_astar():
@@ -25,22 +46,17 @@ def benchmark_astar():
         print(f"\nCondition: {condition_name}")
         print("-" * 70)
 
-        total_time = 0
-        for run in range(3):
-            start_time = time.perf_counter()
-            path = astar(grid, start, goal, speed_based=True)
-            end_time = time.perf_counter()
-
-            elapsed = end_time - start_time
-            total_time += elapsed
-
-            if path is not None:
-                print(f"  Run {run + 1}: {elapsed*1000:.2f}ms")
-            else:
-                print(f"  Run {run + 1}: {elapsed*1000:.2f}ms (No path)")
+        print(" Reference (dict based):")
+        reference_time, reference_path = time_pathfinder(
+            astar_reference, grid, start, goal
+        )
+        print(" Array engine:")
+        array_time, array_path = time_pathfinder(astar, grid, start, goal)
 
-        avg_time = total_time / 3
-        print(f"  Average: {avg_time*1000:.2f}ms")
+        same_path = [tuple(map(int, p)) for p in reference_path] == [
+            tuple(map(int, p)) for p in array_path
+        ]
+        print(f"  Speedup: {reference_time / array_time:.2f}x, same path: {same_path}")
 
     print("\n" + "=" * 70)
     print("BENCHMARK COMPLETE")
@@ -0,0 +1,62 @@
+import numpy as np
+import time
+from flow_accumulation import (
+    accumulate_flow_d8,
+    accumulate_rain,
+    accumulate_rain_reference,
+    get_flow_targets,
+)
+
+
+def benchmark_flow_accumulation(iterations=30):
+    print("\n" + "=" * 70)
+    print(f"FLOW ACCUMULATION ({iterations} RAIN ITERATIONS)")
+    print("=" * 70)
+
+    for grid_size in (512, 2048):
+        index_shifts = np.random.randint(-1, 2, (grid_size, grid_size, 2))
+        shape = index_shifts.shape[:2]
+
+        print(f"\nGrid size: {grid_size}x{grid_size}")
+        print("-" * 70)
+
+        # The cell by cell loop is timed for one iteration and scaled
+        start_time = time.perf_counter()
+        accumulate_rain_reference(index_shifts, iterations=1)
+        reference_time = (time.perf_counter() - start_time) * iterations
+        print(f"  Reference loop (estimated): {reference_time*1000:.2f}ms")
+
+        for last_writer_wins in (True, False):
+            start_time = time.perf_counter()
+            accumulate_rain(
+                get_flow_targets(index_shifts),
+                shape,
+                iterations=iterations,
+                last_writer_wins=last_writer_wins,
+            )
+            elapsed = time.perf_counter() - start_time
+            mode = "last writer wins" if last_writer_wins else "additive"
+            print(
+                f"  Vectorized, {mode}: {elapsed*1000:.2f}ms "
+                f"(speedup {reference_time / elapsed:.1f}x)"
+            )
+
+    print("\n" + "=" * 70)
+    print("SINGLE PASS D8 ACCUMULATION")
+    print("=" * 70)
+
+    for grid_size in (512, 2048, 4096):
+        index_shifts = np.random.randint(-1, 2, (grid_size, grid_size, 2))
+
+        start_time = time.perf_counter()
+        accumulate_flow_d8(get_flow_targets(index_shifts), index_shifts.shape[:2])
+        elapsed = time.perf_counter() - start_time
+        print(f"  {grid_size}x{grid_size}: {elapsed*1000:.2f}ms")
+
+    print("\n" + "=" * 70)
+    print("BENCHMARK COMPLETE")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    benchmark_flow_accumulation()
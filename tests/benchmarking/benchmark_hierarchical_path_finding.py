@@ -0,0 +1,80 @@
+import numpy as np
+import time
+from scipy.ndimage import label
+from hierarchical_path_finding import HierarchicalPathFinder
+from path_finding import astar_flat, movement_cost_grid
+from perlin_noise import generate_fractal_noise_2d
+
+
+def path_cost(cost, path):
+    return sum(cost[index] for index in path[1:])
+
+
+def benchmark_hierarchical_path_finding(number_of_queries=5):
+    print("\n" + "=" * 70)
+    print("HPA* VS A* ON TERRAIN LIKE GRIDS")
+    print("=" * 70)
+
+    land_travel_speed_mapping = np.array([-1, -1, 1, 1, 1, 0.8, 0.5, 0.2])
+    for grid_size in (512, 1024, 2048):
+        np.random.seed(2137)
+        terrain_noise = generate_fractal_noise_2d((grid_size, grid_size), (4, 4), 5)
+        terrain_type_map = (
+            np.digitize(terrain_noise, [-1.1, -0.6, -0.2, -0.1, 0.3, 0.7, 0.9, 1.1]) - 1
+        )
+        grid = land_travel_speed_mapping[terrain_type_map]
+        cost = movement_cost_grid(grid, speed_based=True)
+
+        # Queries inside the largest land region, like city connections
+        land_regions, _ = label(grid > 0)
+        largest_region = np.argmax(np.bincount(land_regions.ravel())[1:]) + 1
+        land_cells = np.flatnonzero(land_regions == largest_region)
+        queries = np.random.choice(land_cells, (number_of_queries, 2))
+
+        print(f"\nGrid size: {grid_size}x{grid_size}")
+        print("-" * 70)
+
+        start_time = time.perf_counter()
+        path_finder = HierarchicalPathFinder(grid, speed_based=True)
+        build_time = time.perf_counter() - start_time
+        print(
+            f"  HPA* preprocessing: {build_time*1000:.2f}ms "
+            f"({path_finder.number_of_abstract_nodes} abstract nodes)"
+        )
+
+        astar_time = 0
+        hierarchical_time = 0
+        cost_ratios = []
+        for start_index, goal_index in queries:
+            start_time = time.perf_counter()
+            astar_path = astar_flat(cost, grid.shape, int(start_index), int(goal_index))
+            astar_time += time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            hierarchical_path = path_finder.find_flat_path(
+                int(start_index), int(goal_index)
+            )
+            hierarchical_time += time.perf_counter() - start_time
+
+            cost_ratios.append(
+                path_cost(cost, hierarchical_path)
+                / max(path_cost(cost, astar_path), 1e-9)
+            )
+
+        print(f"  A* average query: {astar_time / number_of_queries*1000:.2f}ms")
+        print(
+            f"  HPA* average query: {hierarchical_time / number_of_queries*1000:.2f}ms"
+        )
+        print(f"  Query speedup: {astar_time / hierarchical_time:.2f}x")
+        print(
+            f"  Path cost vs A*: mean {np.mean(cost_ratios):.3f}, "
+            f"max {np.max(cost_ratios):.3f}"
+        )
+
+    print("\n" + "=" * 70)
+    print("BENCHMARK COMPLETE")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    benchmark_hierarchical_path_finding()
@@ -0,0 +1,35 @@
+import random
+import time
+from city_factory import CityFactory
+from global_market import GlobalMarket
+
+
+def benchmark_market_engine(ticks=50):
+    print("\n" + "=" * 70)
+    print(f"GLOBAL MARKET UPDATE ({ticks} TICKS)")
+    print("=" * 70)
+
+    for number_of_cities in (140, 1000, 10000):
+        random.seed(0)
+        global_market = GlobalMarket({}, [])
+        city_factory = CityFactory(global_market)
+        cities = [
+            city_factory.create_city(position=(index, index))
+            for index in range(number_of_cities)
+        ]
+        for city in cities:
+            city.consume_resources()
+
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            global_market.update_prices()
+        elapsed = (time.perf_counter() - start_time) / ticks
+        print(f"  {number_of_cities} cities: {elapsed*1000:.2f}ms per update_prices")
+
+    print("\n" + "=" * 70)
+    print("BENCHMARK COMPLETE")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    benchmark_market_engine()
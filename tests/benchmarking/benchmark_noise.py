@@ -0,0 +1,65 @@
+import numpy as np
+import time
+import tracemalloc
+from perlin_noise import generate_fractal_noise_2d, generate_fractal_noise_2d_compact
+
+
+def measure(generate, *args, **kwargs):
+    # NumPy reports its allocations to tracemalloc
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    noise = generate(*args, **kwargs)
+    elapsed = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return noise, elapsed, peak
+
+
+def benchmark_noise(res=(4, 4), octaves=5):
+    print("\n" + "=" * 70)
+    print(f"FRACTAL NOISE ({octaves} OCTAVES)")
+    print("=" * 70)
+
+    for grid_size in (512, 2048, 8192):
+        shape = (grid_size, grid_size)
+        print(f"\nGrid size: {grid_size}x{grid_size}")
+        print("-" * 70)
+
+        reference = None
+        # The reference needs several GB at 8192
+        if grid_size <= 2048:
+            np.random.seed(0)
+            reference, elapsed, peak = measure(
+                generate_fractal_noise_2d, shape, res, octaves
+            )
+            print(f"  Reference float64: {elapsed*1000:.2f}ms, peak {peak/2**20:.1f}MB")
+
+        np.random.seed(0)
+        noise, elapsed, peak = measure(
+            generate_fractal_noise_2d_compact, shape, res, octaves
+        )
+        print(f"  Compact float32:   {elapsed*1000:.2f}ms, peak {peak/2**20:.1f}MB")
+        if reference is not None:
+            print(f"  Max difference: {np.abs(reference - noise).max():.2e}")
+
+        for workers in (1, 4):
+            _, elapsed, peak = measure(
+                generate_fractal_noise_2d_compact,
+                shape,
+                res,
+                octaves,
+                seed=0,
+                workers=workers,
+            )
+            print(
+                f"  Seeded, {workers} threads: {elapsed*1000:.2f}ms, "
+                f"peak {peak/2**20:.1f}MB"
+            )
+
+    print("\n" + "=" * 70)
+    print("BENCHMARK COMPLETE")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    benchmark_noise()
@@ -0,0 +1,47 @@
+import random
+import time
+from city_factory import CityFactory
+from global_market import GlobalMarket
+from production_engine import ProductionEngine
+
+
+def benchmark_production_engine(ticks=20):
+    print("\n" + "=" * 70)
+    print(f"CITY PRODUCTION ({ticks} TICKS)")
+    print("=" * 70)
+
+    for number_of_cities in (140, 1000, 10000):
+        random.seed(0)
+        global_market = GlobalMarket({}, [])
+        city_factory = CityFactory(global_market)
+        cities = [
+            city_factory.create_city(position=(index, index))
+            for index in range(number_of_cities)
+        ]
+        production_engine = ProductionEngine(global_market, seed=0)
+        for city in cities:
+            production_engine.add_city(city)
+        global_market.update_prices()
+
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            for city in cities:
+                city.produce_resources()
+        building_by_building = (time.perf_counter() - start_time) / ticks
+
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            production_engine.produce()
+        vectorized = (time.perf_counter() - start_time) / ticks
+        print(
+            f"  {number_of_cities} cities: {building_by_building*1000:.2f}ms "
+            f"building by building, {vectorized*1000:.2f}ms production engine"
+        )
+
+    print("\n" + "=" * 70)
+    print("BENCHMARK COMPLETE")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    benchmark_production_engine()
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from city_connector import CityConnector
+from path_cache import PathCache
+
+
+@pytest.fixture
+def setup_map():
+    rng = np.random.default_rng(5)
+    terrain_type_map = rng.choice([0, 1, 2, 3, 3, 3, 4, 5], (64, 64))
+    terrain_type_map[20:44, 20:44] = 3
+    city_positions = rng.integers(0, 64, (12, 2))
+    return city_positions, terrain_type_map
+
+
+@pytest.mark.parametrize("routing", ["astar", "dijkstra"])
+def test_parallel_routing_matches_serial(setup_map, routing):
+    city_positions, terrain_type_map = setup_map
+    land_travel_speed_mapping = np.array([-1, -1, 1, 1, 1, 0.8, 0.5, 0.2])
+    water_travel_speed_mapping = np.array([2, 2, -1, -1, -1, -1, -1, -1])
+
+    serial_maps = CityConnector(routing=routing).generate_cities_connections(
+        city_positions,
+        terrain_type_map,
+        land_travel_speed_mapping,
+        water_travel_speed_mapping,
+    )
+    parallel_maps = CityConnector(
+        routing=routing, workers=2
+    ).generate_cities_connections(
+        city_positions,
+        terrain_type_map,
+        land_travel_speed_mapping,
+        water_travel_speed_mapping,
+    )
+
+    for serial_map, parallel_map in zip(serial_maps, parallel_maps):
+        assert serial_map.any()
+        np.testing.assert_array_equal(serial_map, parallel_map)
+
+
+@pytest.mark.parametrize("routing", ["a*", "Dijkstra", "hpa"])
+def test_unknown_routing_is_rejected(routing):
+    with pytest.raises(ValueError):
+        CityConnector(routing=routing)
+
+
+def test_hierarchical_routing_rejects_workers():
+    with pytest.raises(ValueError):
+        CityConnector(routing="hierarchical", workers=2)
+
+
+def test_cached_routing_matches_uncached(setup_map):
+    city_positions, terrain_type_map = setup_map
+    land_travel_speed = np.array([-1, -1, 1, 1, 1, 0.8, 0.5, 0.2])[terrain_type_map]
+    region_to_cities = {1: list(range(len(city_positions)))}
+    path_cache = PathCache()
+
+    uncached_map = CityConnector().create_path_between_cities(
+        city_positions, region_to_cities, land_travel_speed
+    )
+    first_map = CityConnector(path_cache=path_cache).create_path_between_cities(
+        city_positions, region_to_cities, land_travel_speed
+    )
+    misses = path_cache.misses
+    second_map = CityConnector(path_cache=path_cache).create_path_between_cities(
+        city_positions, region_to_cities, land_travel_speed
+    )
+
+    np.testing.assert_array_equal(uncached_map, first_map)
+    np.testing.assert_array_equal(uncached_map, second_map)
+    assert path_cache.misses == misses
+    assert path_cache.hits == misses
+
+
+def test_region_index_assigns_cities_by_label(setup_map):
+    city_positions, terrain_type_map = setup_map
+    city_connector = CityConnector()
+    land_types = [2, 3, 4, 5, 6, 7]
+    city_connector.detect_terrain_regions(terrain_type_map, [0, 1])
+
+    regions = city_connector.detect_terrain_regions(terrain_type_map, land_types)
+
+    land_mask = np.isin(terrain_type_map, land_types)
+    assert regions.sizes.sum() == land_mask.sum()
+    for city_position, region_id in zip(
+        city_positions, regions.get_region_ids(city_positions)
+    ):
+        city_position = tuple(city_position)
+        if region_id:
+            assert regions.get_mask(region_id)[city_position]
+            rows, cols = regions.get_bounding_box(region_id)
+            assert rows.start <= city_position[0] < rows.stop
+            assert cols.start <= city_position[1] < cols.stop
+        else:
+            assert not land_mask[city_position]
+
+
+@pytest.mark.parametrize("max_distance", [1, 3, 5])
+def test_nearby_region_ids_pick_lowest_region_in_range(setup_map, max_distance):
+    _, terrain_type_map = setup_map
+    regions = CityConnector().detect_terrain_regions(terrain_type_map, [0, 1])
+    positions = np.argwhere(np.ones_like(terrain_type_map))
+
+    nearby_region_ids = regions.get_region_ids(positions, max_distance=max_distance)
+
+    region_positions = np.argwhere(regions.labeled_array > 0)
+    region_ids = regions.get_region_ids(region_positions)
+    for position, nearby_region_id in zip(positions, nearby_region_ids):
+        in_range = ((region_positions - position) ** 2).sum(axis=1) <= max_distance**2
+        expected = region_ids[in_range].min() if in_range.any() else 0
+        assert nearby_region_id == expected
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from flow_accumulation import (
+    accumulate_flow_d8,
+    accumulate_rain,
+    accumulate_rain_reference,
+    get_flow_targets,
+)
+
+
+@pytest.fixture
+def setup_index_shifts():
+    rng = np.random.default_rng(0)
+    index_shifts = rng.integers(-1, 2, (30, 41, 2))
+    index_shifts[rng.random((30, 41)) < 0.2] = 0
+    return index_shifts
+
+
+def test_get_flow_targets_clips_to_map_edges():
+    index_shifts = np.zeros((3, 4, 2), dtype=int)
+    index_shifts[0, 0] = (-1, -1)
+    index_shifts[2, 3] = (1, 1)
+    index_shifts[1, 1] = (1, 1)
+
+    flow_targets = get_flow_targets(index_shifts)
+
+    assert flow_targets[0] == 0
+    assert flow_targets[11] == 11
+    assert flow_targets[5] == 10
+
+
+def test_last_writer_wins_matches_reference(setup_index_shifts):
+    index_shifts = setup_index_shifts
+
+    accumulation = accumulate_rain(
+        get_flow_targets(index_shifts), index_shifts.shape[:2], iterations=30
+    )
+
+    np.testing.assert_array_equal(
+        accumulation, accumulate_rain_reference(index_shifts, iterations=30)
+    )
+
+
+def test_additive_mode_conserves_water(setup_index_shifts):
+    index_shifts = setup_index_shifts
+    number_of_cells = index_shifts.shape[0] * index_shifts.shape[1]
+
+    accumulation = accumulate_rain(
+        get_flow_targets(index_shifts),
+        index_shifts.shape[:2],
+        iterations=1,
+        last_writer_wins=False,
+    )
+
+    assert accumulation.sum() == pytest.approx(2 * number_of_cells)
+
+
+def test_d8_accumulates_whole_river():
+    index_shifts = np.zeros((100, 3, 2), dtype=int)
+    index_shifts[:, :, 0] = 1  # Everything flows down
+
+    accumulation = accumulate_flow_d8(get_flow_targets(index_shifts), (100, 3))
+
+    np.testing.assert_array_equal(accumulation[:, 1], np.arange(1, 101))
+
+
+def test_d8_sinks_collect_all_rain():
+    size = 31
+    rows, cols = np.indices((size, size))
+    center = size // 2
+    index_shifts = np.stack([np.sign(center - rows), np.sign(center - cols)], axis=-1)
+
+    accumulation = accumulate_flow_d8(get_flow_targets(index_shifts), (size, size))
+
+    assert accumulation[center, center] == size * size
+    assert accumulation[0, 0] == 1
@@ -3,7 +3,7 @@ from global_market import GlobalMarket
 from local_market import LocalMarket
 from map import City
 from npc import NPC
-from resources import Resource, ResourceName
+from resources import Resource, ResourceName, resource_registry
 from collections import defaultdict
 
 
@@ -213,3 +213,68 @@ def test_estimate_base_resource_price_with_existing_amount(setup_global_market):
     estimated_price = global_market.estimate_base_resource_price(ResourceName.Iron)
 
     assert estimated_price == 99.00990099009901  # 10000 / (100 + 1)
+
+
+def test_estimated_prices_are_cached_until_next_update():
+    global_market = GlobalMarket([], [])
+    for amount in (100, 300):
+        LocalMarket(
+            global_market,
+            {
+                ResourceName.Iron: Resource(ResourceName.Iron, amount),
+                ResourceName.Wood: Resource(ResourceName.Wood, 2 * amount),
+            },
+        )
+    global_market.update_prices()
+
+    iron_price = global_market.estimate_base_resource_price(ResourceName.Iron)
+    for resource_name in (ResourceName.Iron, ResourceName.Wood):
+        estimated_price = global_market.estimated_base_prices[
+            resource_registry.get_id(resource_name)
+        ]
+        assert global_market.estimate_base_resource_price(resource_name) == (
+            estimated_price
+        )
+        assert estimated_price == pytest.approx(
+            global_market.get_market_share(defaultdict(int, {resource_name: 1}))[
+                resource_name
+            ]
+            / max(1, global_market.total_amount[resource_name])
+        )
+
+    # A changed modifier isn't served from the estimates of the last update
+    global_market.price_value_modifiers[ResourceName.Iron] = 3
+    assert global_market.estimate_base_resource_price(
+        ResourceName.Iron
+    ) != pytest.approx(iron_price)
+
+
+def test_modifiers_replaced_by_a_dict_are_estimated_per_resource():
+    global_market = GlobalMarket([], [])
+    LocalMarket(
+        global_market,
+        {
+            ResourceName.Iron: Resource(ResourceName.Iron, 100),
+            ResourceName.Wood: Resource(ResourceName.Wood, 300),
+        },
+    )
+    global_market.price_value_modifiers = {
+        ResourceName.Iron: 1.0,
+        ResourceName.Wood: 1.0,
+    }
+    global_market.update_prices()
+
+    assert global_market.estimated_base_prices is None
+    iron_price = global_market.estimate_base_resource_price(ResourceName.Iron)
+    assert iron_price == pytest.approx(
+        global_market.get_market_share(defaultdict(int, {ResourceName.Iron: 1}))[
+            ResourceName.Iron
+        ]
+        / 100
+    )
+
+    # Changes of the dict are seen right away, like before the estimates
+    global_market.price_value_modifiers[ResourceName.Iron] = 3.0
+    assert global_market.estimate_base_resource_price(
+        ResourceName.Iron
+    ) != pytest.approx(iron_price)
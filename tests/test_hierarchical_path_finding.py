@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from scipy.ndimage import label
+from hierarchical_path_finding import HierarchicalPathFinder
+from path_finding import (
+    astar_flat,
+    dijkstra_flat,
+    movement_cost_grid,
+    reconstruct_flat_path,
+)
+from perlin_noise import generate_fractal_noise_2d
+
+
+def path_cost(cost, path):
+    return sum(cost[index] for index in path[1:])
+
+
+@pytest.fixture
+def setup_grid():
+    rng = np.random.default_rng(3)
+    return rng.choice([1, 1, 1, 0.8, 0.5, 0.2, 2], (70, 90)).astype(float)
+
+
+def test_path_is_connected(setup_grid):
+    grid = setup_grid
+    path_finder = HierarchicalPathFinder(grid, cluster_size=16)
+
+    path = path_finder.find_path((3, 5), (66, 81))
+
+    assert path[0] == (3, 5)
+    assert path[-1] == (66, 81)
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        assert abs(row - next_row) + abs(col - next_col) == 1
+
+
+def test_path_cost_close_to_optimal(setup_grid):
+    grid = setup_grid
+    cost = movement_cost_grid(grid)
+    path_finder = HierarchicalPathFinder(grid, cluster_size=16, max_entrance_width=4)
+    rng = np.random.default_rng(0)
+
+    for start_index, goal_index in rng.integers(0, grid.size, (20, 2)):
+        path = path_finder.find_flat_path(int(start_index), int(goal_index))
+        came_from = dijkstra_flat(cost, grid.shape, int(start_index), [goal_index])
+        optimal_path = reconstruct_flat_path(came_from, start_index, goal_index)
+        assert path_cost(cost, path) <= 1.25 * path_cost(cost, optimal_path) + 1e-9
+
+
+def test_path_cost_close_to_astar_on_terrain():
+    # Same kind of map as the benchmark, the observed ratio stays around 1.03
+    land_travel_speed_mapping = np.array([-1, -1, 1, 1, 1, 0.8, 0.5, 0.2])
+    np.random.seed(2137)
+    terrain_noise = generate_fractal_noise_2d((256, 256), (4, 4), 5)
+    terrain_type_map = (
+        np.digitize(terrain_noise, [-1.1, -0.6, -0.2, -0.1, 0.3, 0.7, 0.9, 1.1]) - 1
+    )
+    grid = land_travel_speed_mapping[terrain_type_map]
+    cost = movement_cost_grid(grid, speed_based=True)
+    land_regions, _ = label(grid > 0)
+    largest_region = np.argmax(np.bincount(land_regions.ravel())[1:]) + 1
+    land_cells = np.flatnonzero(land_regions == largest_region)
+    path_finder = HierarchicalPathFinder(grid, speed_based=True)
+
+    for start_index, goal_index in np.random.choice(land_cells, (10, 2)):
+        path = path_finder.find_flat_path(int(start_index), int(goal_index))
+        optimal_path = astar_flat(cost, grid.shape, int(start_index), int(goal_index))
+        assert path_cost(cost, path) <= 1.1 * path_cost(cost, optimal_path) + 1e-9
+
+
+@pytest.mark.parametrize("suboptimality_bound", [1.0, 1.05, 1.25])
+def test_path_cost_within_suboptimality_bound(setup_grid, suboptimality_bound):
+    grid = setup_grid
+    cost = movement_cost_grid(grid)
+    path_finder = HierarchicalPathFinder(
+        grid,
+        cluster_size=16,
+        max_entrance_width=16,
+        suboptimality_bound=suboptimality_bound,
+    )
+    rng = np.random.default_rng(1)
+
+    for start_index, goal_index in rng.integers(0, grid.size, (20, 2)):
+        path = path_finder.find_flat_path(int(start_index), int(goal_index))
+        optimal_path = astar_flat(cost, grid.shape, int(start_index), int(goal_index))
+        assert path_cost(cost, path) <= (
+            suboptimality_bound * path_cost(cost, optimal_path) + 1e-9
+        )
+
+
+def test_same_cell():
+    path_finder = HierarchicalPathFinder(np.ones((40, 40)), cluster_size=16)
+    assert path_finder.find_path((5, 5), (5, 5)) == [(5, 5)]
+
+
+def test_crossing_impassable_cells_falls_back_to_flat_search():
+    grid = np.ones((40, 40))
+    grid[:, 16:32] = -1
+    path_finder = HierarchicalPathFinder(grid, cluster_size=16)
+
+    path = path_finder.find_path((0, 0), (39, 39))
+
+    assert path[0] == (0, 0)
+    assert path[-1] == (39, 39)
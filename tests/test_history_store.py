@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from global_market import GlobalMarket
+from history_store import BoundedHistory, TieredHistory
+from local_market import LocalMarket
+from resources import Resource, ResourceName
+
+
+@pytest.fixture
+def setup_history():
+    history = BoundedHistory(dtype=np.int64, capacity=50, tiers=((10, 12), (100, 5)))
+    for value in range(1234):
+        history.append(value)
+    return history
+
+
+def test_keeps_last_ticks_like_a_list(setup_history):
+    history = setup_history
+
+    assert len(history) == 50
+    assert history[0] == 1184
+    assert history[-3:] == [1231, 1232, 1233]
+    assert history == list(range(1184, 1234))
+
+
+def test_downsamples_older_ticks_into_tiers(setup_history):
+    history = setup_history
+
+    tens = history.get_tier(0)
+    assert len(tens) == 12
+    assert tens[-1].tolist() == [1220, 1224.5, 1229]
+    hundreds = history.get_tier(1)
+    assert len(hundreds) == 5
+    assert hundreds[0].tolist() == [700, 749.5, 799]
+    assert hundreds[-1].tolist() == [1100, 1149.5, 1199]
+
+
+def test_columns_are_appended_independently():
+    history = TieredHistory((3, 2), np.int64, capacity=16, tiers=((4, 8),))
+    for tick in range(30):
+        history.append((np.array([0, 2]), 1), np.array([tick, 100 + tick]))
+
+    assert history.get((2, 1)).tolist() == list(range(114, 130))
+    assert history.get((1, 1)).tolist() == []
+    assert history.get_tier(0, (0, 1))[-1].tolist() == [24, 25.5, 27]
+
+
+def test_tiers_must_be_buildable_from_the_tier_below():
+    with pytest.raises(ValueError):
+        TieredHistory((1,), capacity=50, tiers=((10, 5), (100, 5)))
+    with pytest.raises(ValueError):
+        TieredHistory((1,), capacity=50, tiers=((10, 20), (25, 5)))
+
+
+def test_markets_average_over_wrapped_history():
+    global_market = GlobalMarket([], [], history_capacity=32, history_tiers=((4, 8),))
+    local_market = LocalMarket(
+        global_market, {ResourceName.Iron: Resource(ResourceName.Iron, 10)}
+    )
+    local_market.number_of_ticks_for_average = 5
+    global_market.current_price[ResourceName.Iron] = 10.0
+
+    for tick in range(100):
+        local_market.consumed_resources[ResourceName.Iron] = tick
+        global_market.market_engine.update_prices(global_market.current_price)
+
+    assert len(local_market.consumption_history[ResourceName.Iron]) == 32
+    assert local_market.get_recent_average_consumption(ResourceName.Iron) == (
+        sum(range(95, 100)) / 5
+    )
+    with pytest.raises(ValueError):
+        local_market.number_of_ticks_for_average = 33
+
+
+def test_integer_histories_read_back_as_integers():
+    global_market = GlobalMarket([], [], history_capacity=32, history_tiers=((4, 8),))
+    local_market = LocalMarket(
+        global_market, {ResourceName.Iron: Resource(ResourceName.Iron, 10)}
+    )
+
+    for tick in range(50):
+        local_market.consumed_resources[ResourceName.Iron] = tick % 3
+        global_market.update_prices()
+
+    for market in (global_market, local_market):
+        for history in (
+            market.consumption_history,
+            market.production_history,
+            market.amount_history,
+        ):
+            assert len(history[ResourceName.Iron]) == 32
+            assert all(type(value) is int for value in history[ResourceName.Iron])
+    assert type(global_market.price_history[ResourceName.Iron][-1]) is float
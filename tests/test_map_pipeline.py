@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from map_pipeline import MapPipeline, MapStage
+from world_cache import WorldArtifactCache
+
+STAGES = [
+    MapStage("noise", ["seed"], [], ["noise"], uses_random=True),
+    MapStage("terrain", ["sea_level"], ["noise"], ["terrain"]),
+    MapStage("cities", ["city_distance"], ["terrain"], ["cities"]),
+]
+
+
+def run_pipeline(pipeline, parameters):
+    np.random.seed(parameters["seed"])
+    stage_keys = {}
+    (noise,) = pipeline.run_stage(
+        STAGES[0], parameters, stage_keys, lambda: np.random.rand(4, 4)
+    )
+    (terrain,) = pipeline.run_stage(
+        STAGES[1], parameters, stage_keys, lambda: noise > parameters["sea_level"]
+    )
+    (cities,) = pipeline.run_stage(
+        STAGES[2],
+        parameters,
+        stage_keys,
+        lambda: np.argwhere(terrain)[:: parameters["city_distance"]],
+    )
+    return noise, terrain, cities, np.random.rand()
+
+
+@pytest.fixture
+def parameters():
+    return {"seed": 1, "sea_level": 0.5, "city_distance": 2}
+
+
+def test_only_downstream_stages_are_recomputed(parameters):
+    pipeline = MapPipeline()
+    run_pipeline(pipeline, parameters)
+    assert pipeline.computed_stages == ["noise", "terrain", "cities"]
+
+    pipeline.computed_stages.clear()
+    run_pipeline(pipeline, {**parameters, "city_distance": 3})
+    assert pipeline.computed_stages == ["cities"]
+
+    pipeline.computed_stages.clear()
+    run_pipeline(pipeline, {**parameters, "sea_level": 0.2})
+    assert pipeline.computed_stages == ["terrain", "cities"]
+
+
+def test_only_last_run_of_a_stage_is_kept_in_memory(parameters):
+    pipeline = MapPipeline()
+    for city_distance in range(1, 20):
+        run_pipeline(pipeline, {**parameters, "city_distance": city_distance})
+    assert len(pipeline._memo) == len(STAGES)
+
+    pipeline.computed_stages.clear()
+    run_pipeline(pipeline, {**parameters, "city_distance": 19})
+    run_pipeline(pipeline, parameters)
+    assert pipeline.computed_stages == ["cities"]
+
+
+def test_stages_are_read_back_from_world_cache(tmp_path, parameters):
+    expected = run_pipeline(MapPipeline(WorldArtifactCache(str(tmp_path))), parameters)
+
+    pipeline = MapPipeline(WorldArtifactCache(str(tmp_path)))
+    outputs = run_pipeline(pipeline, parameters)
+
+    assert pipeline.computed_stages == []
+    for output, expected_output in zip(outputs[:3], expected[:3]):
+        np.testing.assert_array_equal(output, expected_output)
+    # The generator continues as if the random stages had run
+    assert outputs[3] == expected[3]
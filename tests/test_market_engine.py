@@ -0,0 +1,165 @@
+import pytest
+from global_market import GlobalMarket
+from local_market import LocalMarket
+from resources import Resource, ResourceName
+
+
+@pytest.fixture
+def setup_markets():
+    # More markets than the initial engine capacity, so it has to grow
+    global_market = GlobalMarket([], [])
+    local_markets = [
+        LocalMarket(
+            global_market,
+            {
+                ResourceName.Iron: Resource(ResourceName.Iron, 10 * index),
+                ResourceName.Wood: Resource(ResourceName.Wood, 100),
+            },
+        )
+        for index in range(100)
+    ]
+    return global_market, local_markets
+
+
+def test_views_write_through_to_engine(setup_markets):
+    global_market, local_markets = setup_markets
+    local_market = local_markets[70]
+
+    local_market.resources[ResourceName.Iron].amount = 5
+    local_market.remove_consumed_resource(ResourceName.Iron, 8)
+    local_market.consumed_resources[ResourceName.Wood] = 3
+    local_market.gold = 100
+
+    engine = global_market.market_engine
+    iron = engine.get_resource_index(ResourceName.Iron)
+    assert engine.amounts[70, iron] == 0
+    assert local_market.consumed_resources[ResourceName.Iron] == 5
+    assert set(local_market.consumed_resources) == {
+        ResourceName.Iron,
+        ResourceName.Wood,
+    }
+    assert set(local_market.resources) == {ResourceName.Iron, ResourceName.Wood}
+    assert ResourceName.Tools not in local_market.resources
+    assert global_market.calculate_total_gold() == 99 * 5000 + 100
+
+
+def test_vectorized_update_matches_market_by_market(setup_markets):
+    global_market, local_markets = setup_markets
+    other_global_market = GlobalMarket([], [])
+    other_local_markets = [
+        LocalMarket(
+            other_global_market,
+            {
+                resource_name: Resource(resource_name, resource.amount)
+                for resource_name, resource in local_market.resources.items()
+            },
+        )
+        for local_market in local_markets
+    ]
+    base_prices = {ResourceName.Iron: 10.0, ResourceName.Wood: 3.0}
+    global_market.current_price.update(base_prices)
+    other_global_market.current_price.update(base_prices)
+
+    for tick in range(30):
+        for index, (local_market, other_local_market) in enumerate(
+            zip(local_markets, other_local_markets)
+        ):
+            for market in (local_market, other_local_market):
+                market.remove_consumed_resource(ResourceName.Iron, (index + tick) % 4)
+                market.add_produced_resource(ResourceName.Wood, tick % 3)
+            other_local_market.update_prices()
+        global_market.market_engine.update_prices(global_market.current_price)
+
+    for local_market, other_local_market in zip(local_markets, other_local_markets):
+        for resource_name in base_prices:
+            assert list(local_market.price_history[resource_name]) == list(
+                other_local_market.price_history[resource_name]
+            )
+            assert local_market.get_resource_price(
+                resource_name
+            ) == other_local_market.get_resource_price(resource_name)
+
+
+def test_assigned_history_is_used_by_engine(setup_markets):
+    global_market, local_markets = setup_markets
+    local_market = local_markets[0]
+    local_market.consumption_history[ResourceName.Iron] = [5, 15, 25, 35, 45]
+    local_market.number_of_ticks_for_average = 5
+
+    engine = global_market.market_engine
+    iron = engine.get_resource_index(ResourceName.Iron)
+    average = engine.get_recent_average("consumption", iron, [0])
+
+    assert average[0] == local_market.get_recent_average_consumption(ResourceName.Iron)
+    assert local_market.consumption_history[ResourceName.Iron][-2:] == [35, 45]
+
+
+def test_window_sums_follow_appends_and_window_changes(setup_markets):
+    global_market, local_markets = setup_markets
+    local_market = local_markets[3]
+    local_market.number_of_ticks_for_average = 4
+    global_market.current_price[ResourceName.Iron] = 10.0
+
+    for tick in range(50):
+        local_market.consumed_resources[ResourceName.Iron] = tick
+        global_market.market_engine.update_prices(global_market.current_price)
+    assert local_market.get_recent_average_consumption(ResourceName.Iron) == (
+        sum(range(46, 50)) / 4
+    )
+
+    local_market.number_of_ticks_for_average = 20
+    assert local_market.get_recent_average_consumption(ResourceName.Iron) == (
+        sum(range(30, 50)) / 20
+    )
+
+
+def test_running_totals_match_full_scan(setup_markets):
+    global_market, local_markets = setup_markets
+    global_market.check_totals = True
+    for index, local_market in enumerate(local_markets):
+        local_market.remove_consumed_resource(ResourceName.Iron, index % 7)
+        local_market.add_produced_resource(ResourceName.Wood, index % 3)
+        local_market.resources[ResourceName.Wood].amount = 2 * index
+        local_market.gold -= index
+    del local_markets[5].consumed_resources[ResourceName.Iron]
+    local_markets[6].produced_resources[ResourceName.Tools] = 4
+
+    global_market.update_prices()
+
+    engine = global_market.market_engine
+    assert global_market.total_consumed == engine.get_totals("consumed", "has_consumed")
+    assert global_market.total_produced[ResourceName.Tools] == 4
+    assert global_market.total_amount[ResourceName.Wood] == sum(
+        2 * index for index in range(100)
+    )
+    assert global_market.total_gold == 100 * 5000 - sum(range(100))
+
+
+def test_fractional_amounts_are_rejected(setup_markets):
+    global_market, local_markets = setup_markets
+    global_market.check_totals = True
+    local_market = local_markets[3]
+
+    with pytest.raises(TypeError):
+        local_market.resources[ResourceName.Wood].amount = 2.5
+    with pytest.raises(TypeError):
+        local_market.add_produced_resource(ResourceName.Wood, 1.5)
+    with pytest.raises(TypeError):
+        local_market.remove_consumed_resource(ResourceName.Iron, 0.5)
+    with pytest.raises(TypeError):
+        local_market.consumed_resources[ResourceName.Iron] = 1.0
+    assert local_market.resources[ResourceName.Wood].amount == 100
+    global_market.calculate_total_resource_amount()
+    assert global_market.total_amount[ResourceName.Wood] == 100 * 100
+    # Gold and prices are read back as Python floats, never numpy scalars
+    assert type(local_market.gold) is float
+    assert type(local_market.current_price[ResourceName.Iron]) is float
+
+
+def test_check_totals_detects_writes_around_the_engine(setup_markets):
+    global_market, local_markets = setup_markets
+    global_market.check_totals = True
+    global_market.market_engine.amounts[0, 0] += 1
+
+    with pytest.raises(RuntimeError):
+        global_market.calculate_total_resource_amount()
@@ -0,0 +1,33 @@
+import numpy as np
+from path_cache import PathCache
+
+
+def test_fingerprint_depends_on_grid_values():
+    grid = np.ones((8, 8))
+    changed_grid = grid.copy()
+    changed_grid[3, 3] = 2
+
+    assert PathCache.fingerprint(grid) == PathCache.fingerprint(grid.copy())
+    assert PathCache.fingerprint(grid) != PathCache.fingerprint(changed_grid)
+
+
+def test_lru_eviction():
+    path_cache = PathCache(max_entries=2)
+    path_cache.put("grid", 0, 1, "astar", [0, 1])
+    path_cache.put("grid", 0, 2, "astar", [0, 1, 2])
+    assert path_cache.get("grid", 0, 1, "astar") == [0, 1]
+
+    path_cache.put("grid", 0, 3, "astar", [0, 1, 2, 3])
+
+    assert path_cache.get("grid", 0, 2, "astar") is None
+    assert path_cache.get("grid", 0, 1, "astar") == [0, 1]
+    assert path_cache.get("grid", 0, 1, "dijkstra") is None
+
+
+def test_disk_store_survives_new_cache(tmp_path):
+    PathCache(cache_dir=str(tmp_path)).put("grid", 4, 7, "astar", [4, 5, 6, 7])
+
+    path_cache = PathCache(cache_dir=str(tmp_path))
+
+    assert path_cache.get("grid", 4, 7, "astar") == [4, 5, 6, 7]
+    assert path_cache.hits == 1
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from path_finding import (
+    astar,
+    astar_flat,
+    astar_reference,
+    dijkstra_flat,
+    find_closest_point,
+    grid_poisson_disk_points,
+    movement_cost_grid,
+    NearestPointIndex,
+    poisson_disk_budget,
+    reconstruct_flat_path,
+    uniformly_spaced_points,
+)
+
+
+def as_int_path(path):
+    return [tuple(int(value) for value in position) for position in path]
+
+
+@pytest.mark.parametrize("speed_based", [True, False])
+@pytest.mark.parametrize("seed", range(10))
+def test_astar_matches_reference(seed, speed_based):
+    rng = np.random.default_rng(seed)
+    grid = rng.choice([-1, 0.2, 0.5, 0.8, 1, 2], (24, 31))
+    start = (int(rng.integers(24)), int(rng.integers(31)))
+    goal = (int(rng.integers(24)), int(rng.integers(31)))
+
+    path = astar(grid, start, goal, speed_based=speed_based)
+    reference_path = astar_reference(grid, start, goal, speed_based=speed_based)
+
+    assert as_int_path(path) == as_int_path(reference_path)
+
+
+def test_astar_start_equals_goal():
+    grid = np.ones((5, 5))
+    assert astar(grid, (2, 3), (2, 3)) == [(2, 3)]
+
+
+def test_astar_flat_returns_flat_indices():
+    grid = np.ones((3, 4))
+    path = astar_flat(movement_cost_grid(grid), grid.shape, 0, 11)
+    assert path[0] == 0
+    assert path[-1] == 11
+    assert len(path) == 6
+
+
+def path_cost(cost, path):
+    return sum(cost[index] for index in path[1:])
+
+
+def test_dijkstra_flat_settles_all_goals_from_one_search():
+    rng = np.random.default_rng(7)
+    grid = rng.uniform(0.2, 2.0, (20, 20))
+    cost = movement_cost_grid(grid)
+    start_index = 45
+    goal_indices = [0, 399, 210, 45]
+
+    came_from = dijkstra_flat(cost, grid.shape, start_index, goal_indices)
+
+    for goal_index in goal_indices:
+        path = reconstruct_flat_path(came_from, start_index, goal_index)
+        astar_path = astar_flat(cost, grid.shape, start_index, goal_index)
+        assert path[0] == start_index
+        assert path[-1] == goal_index
+        assert path_cost(cost, path) <= path_cost(cost, astar_path) + 1e-9
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nearest_point_index_matches_find_closest_point(seed):
+    rng = np.random.default_rng(seed)
+    # Sparse regions make many equally close candidates
+    grid = (rng.random((40, 30)) < 0.02).astype(int)
+    nearest = NearestPointIndex(grid)
+
+    for point in np.argwhere(np.ones_like(grid)):
+        assert nearest.query(point) == find_closest_point(grid, point)
+
+
+def test_nearest_point_index_without_region():
+    assert NearestPointIndex(np.zeros((4, 4))).query((1, 1)) == (None, None)
+
+
+@pytest.mark.parametrize("radius", [5, 12])
+def test_grid_poisson_disk_points_keep_their_distance(radius):
+    points = grid_poisson_disk_points(127, radius, seed=3, min_size=10)
+
+    np.testing.assert_array_equal(points, grid_poisson_disk_points(127, radius, 3, 10))
+    assert points.min() >= 10 and points.max() <= 127
+    distances = np.sqrt(((points[:, None] - points[None]) ** 2).sum(axis=2))
+    np.fill_diagonal(distances, np.inf)
+    # Truncation to whole cells moves points by less than one cell diagonal
+    assert distances.min() > radius - np.sqrt(2)
+    assert len(points) <= poisson_disk_budget(127, radius, 10)
+
+
+def test_saturated_poisson_disk_stays_within_budget():
+    points = uniformly_spaced_points(127, 8, None, seed=3)
+
+    assert len(points) < poisson_disk_budget(127, 8)
+    np.testing.assert_array_equal(
+        points, uniformly_spaced_points(127, 8, np.iinfo(np.int16).max, seed=3)
+    )
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from perlin_noise import generate_fractal_noise_2d, generate_fractal_noise_2d_compact
+
+
+@pytest.mark.parametrize("tileable", [(False, False), (True, True)])
+def test_compact_noise_matches_reference(tileable):
+    np.random.seed(3)
+    expected = generate_fractal_noise_2d((96, 64), (3, 2), 3, tileable=tileable)
+
+    np.random.seed(3)
+    noise = generate_fractal_noise_2d_compact(
+        (96, 64), (3, 2), 3, tileable=tileable, dtype=np.float64, band_rows=10
+    )
+    np.testing.assert_allclose(noise, expected, atol=1e-12)
+
+    np.random.seed(3)
+    noise = generate_fractal_noise_2d_compact((96, 64), (3, 2), 3, tileable=tileable)
+    assert noise.dtype == np.float32
+    np.testing.assert_allclose(noise, expected, atol=1e-5)
+
+
+def test_seeded_noise_does_not_depend_on_workers():
+    expected = generate_fractal_noise_2d_compact((128, 64), (2, 2), 4, seed=11)
+
+    for workers, band_rows in [(2, 16), (4, 7)]:
+        noise = generate_fractal_noise_2d_compact(
+            (128, 64), (2, 2), 4, band_rows=band_rows, seed=11, workers=workers
+        )
+        np.testing.assert_array_equal(noise, expected)
+
+    assert not np.array_equal(
+        expected, generate_fractal_noise_2d_compact((128, 64), (2, 2), 4, seed=12)
+    )
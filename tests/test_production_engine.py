@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from city import City
+from global_market import GlobalMarket
+from local_market import LocalMarket
+from production_buildings import Farm, IronMine, ToolsSmithy
+from production_engine import ProductionEngine
+from resources import Resource, ResourceName
+
+
+class SteadyFarm(Farm):
+    @property
+    def base_production_range(self):
+        return 4, 4
+
+
+class SteadyIronMine(IronMine):
+    @property
+    def base_production_range(self):
+        return 2, 2
+
+
+class SteadyToolsSmithy(ToolsSmithy):
+    @property
+    def base_production_range(self):
+        return 1, 1
+
+
+def create_world():
+    global_market = GlobalMarket([], [])
+    cities = []
+    for index in range(30):
+        buildings = [SteadyIronMine(), SteadyFarm(), SteadyToolsSmithy()]
+        # Different priorities, so some cities run out of wheat for the mine
+        if index % 3 == 0:
+            buildings.reverse()
+        cities.append(
+            City(
+                (index, index),
+                f"City{index}",
+                LocalMarket(
+                    global_market,
+                    {
+                        resource_name: Resource(resource_name, index % 4)
+                        for resource_name in ResourceName
+                    },
+                ),
+                buildings[: 1 + index % 3],
+            )
+        )
+    return global_market, cities
+
+
+@pytest.fixture
+def setup_worlds():
+    return create_world(), create_world()
+
+
+def test_matches_building_by_building_production(setup_worlds):
+    (global_market, cities), (other_global_market, other_cities) = setup_worlds
+    production_engine = ProductionEngine(other_global_market)
+    for city in other_cities:
+        production_engine.add_city(city)
+
+    for tick in range(25):
+        if tick == 10:
+            # A new building only counts after the recipes are invalidated
+            for world_cities in (cities, other_cities):
+                world_cities[1].production_buildings.insert(0, SteadyToolsSmithy())
+            production_engine.invalidate_recipes()
+        for market, world_cities in (
+            (global_market, cities),
+            (other_global_market, other_cities),
+        ):
+            market.update_prices()
+            for index, city in enumerate(world_cities):
+                city.local_market.remove_consumed_resource(
+                    ResourceName.Iron, (index + tick) % 3
+                )
+        for city in cities:
+            city.produce_resources()
+        production_engine.produce()
+
+    engine = global_market.market_engine
+    other_engine = other_global_market.market_engine
+    for name in ("amounts", "produced", "consumed", "has_produced", "has_price"):
+        assert np.array_equal(getattr(engine, name), getattr(other_engine, name))
+    assert np.array_equal(engine.totals["amounts"], other_engine.totals["amounts"])
+    assert engine.produced.any()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from market_engine import MarketEngine
+from resources import Resource, ResourceName, ResourceRegistry, ResourceValues
+
+
+@pytest.fixture
+def setup_registry():
+    return ResourceRegistry(ResourceName)
+
+
+def test_ids_are_dense_in_registration_order(setup_registry):
+    registry = setup_registry
+
+    assert [registry.get_id(resource_name) for resource_name in ResourceName] == list(
+        range(len(ResourceName))
+    )
+    assert registry.register("Coal") == len(ResourceName)
+    assert registry.register("Coal") == len(ResourceName)
+    assert registry.register_all(["Iron", "Salt"]) == [0, len(ResourceName) + 1]
+    assert registry.get_name(len(ResourceName) + 1) == "Salt"
+
+
+def test_resource_values_store_by_id(setup_registry):
+    registry = setup_registry
+    recipe = ResourceValues(
+        {ResourceName.Wheat: 1, ResourceName.Iron: 2}, np.int64, registry
+    )
+
+    assert recipe.get_array().tolist() == [2, 0, 1, 0, 0]
+    assert list(recipe.items()) == [(ResourceName.Iron, 2), (ResourceName.Wheat, 1)]
+
+    registry.register("Coal")
+    recipe["Coal"] = 3
+    del recipe[ResourceName.Iron]
+    assert recipe.get_array().tolist() == [0, 0, 1, 0, 0, 3]
+    assert dict(recipe) == {ResourceName.Wheat: 1, "Coal": 3}
+    with pytest.raises(KeyError):
+        recipe[ResourceName.Iron]
+
+
+def test_markets_grow_for_resources_registered_later(setup_registry):
+    registry = setup_registry
+    market_engine = MarketEngine(registry=registry)
+    market_index = market_engine.add_market(
+        {ResourceName.Iron: Resource(ResourceName.Iron, 10)}
+    )
+
+    for resource_name in ("Coal", "Salt", "Spice", "Silk", "Dye"):
+        registry.register(resource_name)
+    other_market_index = market_engine.add_market({"Silk": Resource("Silk", 5)})
+    market_engine.add_produced(market_index, "Silk", 7)
+
+    silk_amounts = market_engine.amounts[:, registry.get_id("Silk")]
+    assert silk_amounts[[market_index, other_market_index]].tolist() == [7, 5]
+    assert market_engine.get_running_totals("amounts", "has_amount") == {
+        ResourceName.Iron: 10,
+        "Silk": 12,
+    }
+    assert market_engine.get_running_totals("produced", "has_produced") == {"Silk": 7}
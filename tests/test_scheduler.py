@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from scheduler import FixedTimestepScheduler, SimulationThread, SnapshotBuffer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def ticks():
+    return []
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_ticks_follow_tick_rate_not_frame_rate(ticks, clock):
+    scheduler = FixedTimestepScheduler(
+        lambda: ticks.append(clock.now), tick_rate=10, clock=clock
+    )
+    scheduler.advance()
+
+    # Frames at 60 FPS for one second
+    for _ in range(60):
+        clock.now += 1 / 60
+        scheduler.advance()
+
+    assert len(ticks) == 10
+
+
+def test_slow_frame_catches_up_at_most_max_steps(ticks, clock):
+    scheduler = FixedTimestepScheduler(
+        lambda: ticks.append(clock.now),
+        tick_rate=10,
+        max_steps_per_frame=3,
+        clock=clock,
+    )
+    scheduler.advance()
+
+    clock.now += 0.25
+    assert scheduler.advance() == 2
+    clock.now += 1.0
+    assert scheduler.advance() == 3
+    assert scheduler.dropped_ticks == 7
+    assert scheduler.time_until_next_tick() == pytest.approx(0.05)
+
+
+def test_snapshot_buffer_returns_last_published():
+    snapshots = SnapshotBuffer()
+    assert snapshots.read() is None
+
+    snapshots.publish("first")
+    snapshots.publish("second")
+
+    assert snapshots.read() == "second"
+
+
+def test_simulation_thread_publishes_snapshots(ticks):
+    snapshots = SnapshotBuffer()
+    scheduler = FixedTimestepScheduler(lambda: ticks.append(None), tick_rate=500)
+    simulation_thread = SimulationThread(scheduler, lambda: len(ticks), snapshots)
+
+    simulation_thread.start()
+    deadline = time.perf_counter() + 5
+    while (snapshots.read() or 0) < 5 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    simulation_thread.stop()
+
+    assert snapshots.read() >= 5
+    assert not simulation_thread.is_alive()
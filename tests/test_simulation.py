@@ -0,0 +1,55 @@
+import pytest
+import simulation
+from map import GameMap
+from simulation import SIMULATION_PHASES, Simulation
+
+
+class SmallGameMap(GameMap):
+    def generate(self):
+        self.map_shape = (128, 128)
+        self.city_distance = 16
+        super().generate()
+
+
+@pytest.fixture
+def setup_simulation(monkeypatch, request):
+    monkeypatch.setattr(simulation, "GameMap", SmallGameMap)
+    return Simulation(seed=5, vectorized_production=request.param)
+
+
+@pytest.mark.parametrize("setup_simulation", [False, True], indirect=True)
+def test_run_advances_ticks_and_times_every_phase(setup_simulation):
+    simulation = setup_simulation
+    assert simulation.game_map.cities
+
+    report = simulation.run(5)
+    simulation.tick()
+
+    assert simulation.ticks == 6
+    assert report["ticks"] == 5
+    assert set(report["phase_seconds"]) == set(SIMULATION_PHASES)
+    assert set(simulation.phase_times) == set(SIMULATION_PHASES)
+    assert all(seconds > 0 for seconds in simulation.phase_times.values())
+    assert simulation.phase_times["update_prices"] > (
+        report["phase_seconds"]["update_prices"]
+    )
+
+
+@pytest.mark.parametrize("setup_simulation", [False], indirect=True)
+def test_snapshot_copies_market_state(setup_simulation):
+    simulation = setup_simulation
+    simulation.run(3)
+
+    snapshot = simulation.make_snapshot()
+    global_market = simulation.global_market
+
+    assert snapshot.tick == 3
+    assert snapshot.prices == dict(global_market.current_price)
+    assert snapshot.city_prices == {
+        city.name: dict(city.local_market.current_price)
+        for city in simulation.game_map.cities.values()
+    }
+    prices = dict(snapshot.prices)
+    simulation.tick()
+    assert snapshot.prices == prices
+    assert snapshot.tick == 3
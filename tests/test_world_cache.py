@@ -0,0 +1,36 @@
+import numpy as np
+from world_cache import WorldArtifactCache
+
+
+def test_key_depends_on_every_parameter():
+    parameters = {"seed": 2137, "sea_level": -0.2, "mapping": np.array([1, 2])}
+
+    key = WorldArtifactCache.get_key(parameters)
+
+    assert key == WorldArtifactCache.get_key(dict(parameters))
+    assert key != WorldArtifactCache.get_key({**parameters, "sea_level": -0.1})
+    assert key != WorldArtifactCache.get_key({**parameters, "mapping": np.array([1])})
+
+
+def test_artifacts_are_memory_mapped(tmp_path):
+    world_cache = WorldArtifactCache(str(tmp_path))
+    artifact = np.arange(12).reshape(3, 4)
+
+    assert world_cache.load("world", "terrain_noise") is None
+    world_cache.save("world", "terrain_noise", artifact)
+    loaded = world_cache.load("world", "terrain_noise")
+
+    assert isinstance(loaded, np.memmap)
+    np.testing.assert_array_equal(loaded, artifact)
+
+
+def test_random_state_round_trip(tmp_path):
+    world_cache = WorldArtifactCache(str(tmp_path))
+    np.random.seed(5)
+    world_cache.save_random_state("world", "terrain_noise")
+    expected = np.random.rand(3)
+
+    np.random.seed(6)
+    assert world_cache.load_random_state("world", "terrain_noise")
+
+    np.testing.assert_array_equal(np.random.rand(3), expected)
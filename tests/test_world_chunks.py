@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from perlin_noise import generate_fractal_noise_chunk
+from world_chunks import ChunkManager
+
+
+@pytest.fixture
+def chunk_manager():
+    return ChunkManager(seed=7, chunk_size=32, noise_period=16, max_chunks=4)
+
+
+def test_chunks_are_seamless(chunk_manager):
+    area = chunk_manager.get_area(-20, 10, 70, 50)
+
+    expected = generate_fractal_noise_chunk((-20, 10), (70, 50), 16, 5, seed=7)
+    np.testing.assert_array_equal(area.terrain_noise, expected)
+    assert area.terrain_type_map.min() >= 0
+
+
+def test_noise_depends_on_seed_only():
+    noise = generate_fractal_noise_chunk((100, 100), (8, 8), 16, 3, seed=1)
+
+    np.testing.assert_array_equal(
+        noise, generate_fractal_noise_chunk((100, 100), (8, 8), 16, 3, seed=1)
+    )
+    assert not np.array_equal(
+        noise, generate_fractal_noise_chunk((100, 100), (8, 8), 16, 3, seed=2)
+    )
+    assert np.abs(noise).max() <= 1
+
+
+def test_least_recently_used_chunks_are_evicted(chunk_manager):
+    first_chunk = chunk_manager.get_chunk(0, 0)
+    for chunk_col in range(1, 4):
+        chunk_manager.get_chunk(0, chunk_col)
+    assert chunk_manager.get_chunk(0, 0) is first_chunk
+
+    # Chunk (0, 1) is now the least recently used one
+    chunk_manager.get_chunk(1, 0)
+    chunk_manager.get_chunk(0, 0)
+    assert chunk_manager.generated_chunks == 5
+
+    second_chunk = chunk_manager.get_chunk(0, 1)
+    assert chunk_manager.generated_chunks == 6
+    np.testing.assert_array_equal(
+        second_chunk.terrain_noise,
+        generate_fractal_noise_chunk((0, 32), (32, 32), 16, 5, seed=7),
+    )
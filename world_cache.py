@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Bump when map generation changes its output, so stored worlds expire
+WORLD_CACHE_VERSION = 1
+
+
+class WorldArtifactCache:
+    def __init__(self, cache_dir: str, mmap_mode: str | None = "r"):
+        self.cache_dir = cache_dir
+        # Read only memory maps let several processes share the same pages
+        self.mmap_mode = mmap_mode
+
+    @staticmethod
+    def get_key(parameters: dict) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(
+            json.dumps(
+                {"version": WORLD_CACHE_VERSION, "parameters": parameters},
+                sort_keys=True,
+                default=_to_json,
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def load(self, key: str, name: str) -> np.ndarray | None:
+        file_path = self._get_file_path(key, f"{name}.npy")
+        if not os.path.exists(file_path):
+            return None
+        return np.load(file_path, mmap_mode=self.mmap_mode)
+
+    def save(self, key: str, name: str, array: np.ndarray):
+        file_path = self._get_file_path(key, f"{name}.npy")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Write then rename, so concurrent launches never map a partial file
+        temporary_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.save(file, np.asarray(array))
+        os.replace(temporary_path, file_path)
+
+    def load_random_state(self, key: str, name: str) -> bool:
+        file_path = self._get_file_path(key, f"{name}_random_state.npz")
+        if not os.path.exists(file_path):
+            return False
+        with np.load(file_path) as random_state:
+            np.random.set_state(
+                (
+                    "MT19937",
+                    random_state["keys"],
+                    int(random_state["position"]),
+                    int(random_state["has_gauss"]),
+                    float(random_state["cached_gaussian"]),
+                )
+            )
+        return True
+
+    def save_random_state(self, key: str, name: str):
+        file_path = self._get_file_path(key, f"{name}_random_state.npz")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        _, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+        temporary_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez(
+                file,
+                keys=keys,
+                position=position,
+                has_gauss=has_gauss,
+                cached_gaussian=cached_gaussian,
+            )
+        os.replace(temporary_path, file_path)
+
+    def _get_file_path(self, key: str, file_name: str) -> str:
+        return os.path.join(self.cache_dir, key, file_name)
+
+
+def _to_json(value):
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Cannot use {type(value).__name__} in a world cache key")
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from perlin_noise import generate_fractal_noise_chunk
+
+
+def classify_terrain(terrain_noise, sea_level, mointain_peak):
+    return (
+        np.digitize(
+            terrain_noise,
+            [-1.1, -0.6, sea_level, -0.1, 0.3, 0.7, mointain_peak, 1.1],
+        )
+        - 1
+    )
+
+
+class TerrainChunk:
+    def __init__(self, terrain_noise: np.ndarray, terrain_type_map: np.ndarray):
+        self.terrain_noise = terrain_noise
+        self.terrain_type_map = terrain_type_map
+
+
+class ChunkManager:
+    def __init__(
+        self,
+        seed: int,
+        chunk_size: int = 256,
+        noise_period: int = 128,
+        noise_octaves: int = 5,
+        sea_level: float = -0.2,
+        mointain_peak: float = 0.9,
+        max_chunks: int = 64,
+    ):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.noise_period = noise_period
+        self.noise_octaves = noise_octaves
+        self.sea_level = sea_level
+        self.mointain_peak = mointain_peak
+        self.max_chunks = max_chunks
+        self.generated_chunks = 0
+        self._chunks: OrderedDict[tuple[int, int], TerrainChunk] = OrderedDict()
+
+    def get_chunk(self, chunk_row: int, chunk_col: int) -> TerrainChunk:
+        key = (chunk_row, chunk_col)
+        if key in self._chunks:
+            self._chunks.move_to_end(key)
+            return self._chunks[key]
+
+        chunk = self._generate_chunk(chunk_row, chunk_col)
+        self._chunks[key] = chunk
+        while len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def get_area(self, top: int, left: int, height: int, width: int) -> TerrainChunk:
+        # Stitches the area from every chunk it overlaps, e.g. the part of the
+        # world the player is looking at
+        terrain_noise = np.empty((height, width))
+        terrain_type_map = np.empty((height, width), dtype=np.int64)
+        first_row, first_col = top // self.chunk_size, left // self.chunk_size
+        last_row = (top + height - 1) // self.chunk_size
+        last_col = (left + width - 1) // self.chunk_size
+        for chunk_row in range(first_row, last_row + 1):
+            for chunk_col in range(first_col, last_col + 1):
+                chunk = self.get_chunk(chunk_row, chunk_col)
+                chunk_top = chunk_row * self.chunk_size
+                chunk_left = chunk_col * self.chunk_size
+                row_start, row_stop = max(top, chunk_top), min(
+                    top + height, chunk_top + self.chunk_size
+                )
+                col_start, col_stop = max(left, chunk_left), min(
+                    left + width, chunk_left + self.chunk_size
+                )
+                area = (
+                    slice(row_start - top, row_stop - top),
+                    slice(col_start - left, col_stop - left),
+                )
+                in_chunk = (
+                    slice(row_start - chunk_top, row_stop - chunk_top),
+                    slice(col_start - chunk_left, col_stop - chunk_left),
+                )
+                terrain_noise[area] = chunk.terrain_noise[in_chunk]
+                terrain_type_map[area] = chunk.terrain_type_map[in_chunk]
+        return TerrainChunk(terrain_noise, terrain_type_map)
+
+    def _generate_chunk(self, chunk_row: int, chunk_col: int) -> TerrainChunk:
+        self.generated_chunks += 1
+        terrain_noise = generate_fractal_noise_chunk(
+            (chunk_row * self.chunk_size, chunk_col * self.chunk_size),
+            (self.chunk_size, self.chunk_size),
+            self.noise_period,
+            self.noise_octaves,
+            seed=self.seed,
+        )
+        return TerrainChunk(
+            terrain_noise,
+            classify_terrain(terrain_noise, self.sea_level, self.mointain_peak),
+        )